@@ -4,33 +4,47 @@ from discord.ext import commands
 from discord import activity
 import discord
 import datetime
+import functools
 import asyncio
-import json
 import random
 import os
 
 #? Get Bot Data initialization class.
-if os.path.exists("BotData.py"):
+if os.path.exists(os.path.join(os.path.dirname(os.path.abspath(__file__)), "BotData.py")):
     import BotData
 else:
     raise Exception("BotData.py Does not exist!")
+from GroupStore import GroupStore, SqliteGroupStore
+from MemberResolver import resolve_members, split_role_tag
+from RoleExecutor import RoleExecutor
+from CategoryCache import CategoryCache
+from LockManager import LockManager
+from Reconciler import Reconciler
+from Reaper import Reaper
+from Metrics import Metrics
+from Sharding import ShardDirectory, parse_shard_ids
+from RenderCache import HelpCache, GuildIndex, render_guild_names
+from Provisioner import Outbox, Provisioner
+from ChannelEditor import ChannelEditor
+from GroupAdmin import ActivityLog, GROUP_FILTERS, GROUPS_PER_PAGE, bulk_purge, collect_groups, format_age, match_group
+from MemberCache import MemberCache, member_cache_flags
+from Snapshot import Snapshot, file_stamp, read_snapshot, write_snapshot
+from EventLog import EVENT_LOG, LOG_CONTEXT
 
 
 THIS_FOLDER = os.path.dirname(
     os.path.abspath(__file__)
 )  #? Get relative path to our folder.
-CONFIG_FILE_PATH = os.path.join(
-    THIS_FOLDER, "botconfig.cfg"
-)  #? Create path of config file. (name can be changed)
+CONFIG_FILE_PATH = os.environ.get(
+    "PVC_CONFIG_PATH", os.path.join(THIS_FOLDER, "botconfig.cfg")
+)  #? Create path of config file. (name can be changed, or overridden by the environment)
 DATETIME_OBJ = datetime.datetime
 STARTUP_TIME = DATETIME_OBJ.now()
 
 #? Our bot data object.
 BOT_DATA = BotData.BotData()
 #? Json database file path.
-USER_CHANNELS_JSON_PATH = THIS_FOLDER + "/user_channels.json"
-#? Initialize the json database.
-BOT_DATA.read_json(USER_CHANNELS_JSON_PATH)
+USER_CHANNELS_JSON_PATH = os.environ.get("PVC_JSON_PATH", THIS_FOLDER + "/user_channels.json")
 
 #? Read essential files.
 try:
@@ -39,13 +53,162 @@ except Exception as e:
     print(f"{e}")
     exit()
 
+#? Command latency, REST call and store metrics.
+METRICS = Metrics()
+
+#? Shards this process runs, set by `Launcher.py` when running several shard processes.
+SHARD_IDS = parse_shard_ids(os.environ.get("PVC_SHARD_IDS", ""))
+
+#? Structured JSON lines written from a background thread, one log file per shard process.
+LOG_PATH = os.path.join(THIS_FOLDER, BOT_DATA.LOG_PATH) if BOT_DATA.LOG_PATH else None
+if LOG_PATH is not None and SHARD_IDS is not None:
+    LOG_PATH += f".{SHARD_IDS[0]}"
+EVENT_LOG.configure(LOG_PATH, BOT_DATA.LOG_LEVEL, BOT_DATA.LOG_SAMPLE_RATE)
+EVENT_LOG.start()
+#? Commands slower than this (seconds) are always logged, the others are sampled.
+SLOW_COMMAND_SECONDS = 1.0
+
+#? Warm start snapshot of the previous run, one per shard process.
+SNAPSHOT_PATH = os.path.join(THIS_FOLDER, BOT_DATA.SNAPSHOT_PATH)
+if SHARD_IDS is not None:
+    SNAPSHOT_PATH += f".{SHARD_IDS[0]}"
+SNAPSHOT = read_snapshot(SNAPSHOT_PATH) if BOT_DATA.SNAPSHOT_INTERVAL > 0 else None
+
+#? Port of the metrics endpoint, offset by the first shard id so every shard process gets its own.
+METRICS_PORT = BOT_DATA.METRICS_PORT
+if METRICS_PORT and SHARD_IDS is not None:
+    METRICS_PORT += SHARD_IDS[0]
+
+#? Load the group store, either the json database (kept in memory, flushed in the background)
+#? or an sqlite database (migrated once from the json database).
+if BOT_DATA.STORE_BACKEND == 'sqlite':
+    GROUP_STORE = SqliteGroupStore(os.path.join(THIS_FOLDER, BOT_DATA.STORE_PATH), USER_CHANNELS_JSON_PATH)
+else:
+    GROUP_STORE = GroupStore(USER_CHANNELS_JSON_PATH, BOT_DATA.STORE_FLUSH_INTERVAL, BOT_DATA.STORE_FLUSH_THRESHOLD)
+load_started = DATETIME_OBJ.now()
+if (
+    isinstance(GROUP_STORE, GroupStore) and SNAPSHOT is not None
+    and SNAPSHOT.store_stamp is not None and SNAPSHOT.store_stamp == file_stamp(USER_CHANNELS_JSON_PATH)
+):
+    #? The json database did not change since the snapshot was taken, no need to read and validate it.
+    GROUP_STORE.restore(SNAPSHOT.groups, SNAPSHOT.members, SNAPSHOT.legacy, SNAPSHOT.unknown_members)
+else:
+    #? Initialize the json database.
+    BOT_DATA.read_json(USER_CHANNELS_JSON_PATH)
+    GROUP_STORE.load()
+METRICS.store_load_seconds = (DATETIME_OBJ.now() - load_started).total_seconds()
+if isinstance(GROUP_STORE, GroupStore):
+    GROUP_STORE.on_flush = METRICS.store_flush.observe
+
+#? Runs the role assignments of the group commands concurrently, within Discord's rate limits.
+ROLE_EXECUTOR = RoleExecutor()
+#? Per-guild cache of the private voice channels category.
+CATEGORY_CACHE = CategoryCache()
+#? Serializes the commands touching the same group, keyed by (guild id, owner id).
+GROUP_LOCKS = LockManager()
+#? Durable log of the background group creations / deletions, shared by every shard process.
+OUTBOX = Outbox(os.path.join(THIS_FOLDER, BOT_DATA.OUTBOX_PATH))
+OUTBOX.load()
+#? Keeps the group store in sync with the guilds' roles and channels.
+RECONCILER = Reconciler(GROUP_STORE, CATEGORY_CACHE, GROUP_LOCKS, pending_ids=OUTBOX.pending_ids)
+#? Deletes the groups whose voice channel stayed empty for too long.
+REAPER = Reaper(GROUP_STORE, GROUP_LOCKS, BOT_DATA.PVC_IDLE_TTL)
+#? Last voice activity of the private voice channels, shown by the admin commands.
+ACTIVITY = ActivityLog()
+#? Runs the admins' bulk deletions within the guilds' rate limits.
+PURGE_EXECUTOR = RoleExecutor(bucket_size=5)
+#? Merges the edits of a private voice channel into a single request.
+CHANNEL_EDITOR = ChannelEditor(BOT_DATA.CHANNEL_EDIT_WINDOW, GROUP_STORE.group_members)
+
+
+#? Prebuilt help embeds and the incrementally maintained guild list.
+HELP_CACHE = HelpCache()
+GUILD_INDEX = GuildIndex()
+
+if SNAPSHOT is not None:
+    #? Serve the previous run's view until the guilds arrive, the reconciler validates it in the background.
+    CATEGORY_CACHE.restore(SNAPSHOT.categories)
+    GUILD_INDEX.restore(SNAPSHOT.guild_names)
+    RECONCILER.watermarks.update(SNAPSHOT.watermarks)
+    ACTIVITY.restore(SNAPSHOT.activity)
+    EVENT_LOG.info('warm_start', groups=len(GROUP_STORE), guilds=len(SNAPSHOT.guild_names))
+#? Guild directory shared by all the shard processes (sqlite store only).
+SHARD_DIRECTORY = None
+if BOT_DATA.STORE_BACKEND == 'sqlite' and BOT_DATA.SHARD_COUNT != 0:
+    SHARD_DIRECTORY = ShardDirectory(GROUP_STORE.path)
+    SHARD_DIRECTORY.load()
+
+#? Gateway intents and member cache policy, the `tracked` policy only caches the members the groups need.
+BOT_OPTIONS = dict(
+    intents=BOT_DATA.INTENTS,
+    member_cache_flags=member_cache_flags(BOT_DATA.MEMBER_CACHE, BOT_DATA.INTENTS),
+    chunk_guilds_at_startup=BOT_DATA.INTENTS.members and BOT_DATA.MEMBER_CACHE == 'default',
+)
 
 #? Create and Initialize Bot object.
-BOT = Bot(
-    command_prefix=BOT_DATA.BOT_PREFIX,
-    description="Bot by Raz Kissos, helper and useful functions.",
-)  #? Create the discord bot.
+if BOT_DATA.SHARD_COUNT != 0:
+    BOT = AutoShardedBot(
+        command_prefix=BOT_DATA.BOT_PREFIX,
+        description="Bot by Raz Kissos, helper and useful functions.",
+        shard_count=BOT_DATA.SHARD_COUNT if BOT_DATA.SHARD_COUNT > 0 else None,
+        shard_ids=SHARD_IDS,
+        **BOT_OPTIONS,
+    )  #? Create the sharded discord bot (all shards, or the ones given by the launcher).
+else:
+    BOT = Bot(
+        command_prefix=BOT_DATA.BOT_PREFIX,
+        description="Bot by Raz Kissos, helper and useful functions.",
+        **BOT_OPTIONS,
+    )  #? Create the discord bot.
 BOT.remove_command("help")  #? Remove default `help` command (will replace later).
+METRICS.instrument_http(BOT.http)  #? Count and time every REST call the bot makes.
+#? Creates and deletes the groups in the background (`edit_job_reply` is defined with the embed helpers).
+PROVISIONER = Provisioner(
+    OUTBOX, GROUP_STORE, CATEGORY_CACHE, ROLE_EXECUTOR, GROUP_LOCKS, BOT.get_guild,
+    lambda *args: edit_job_reply(*args), REAPER.schedule, BOT_DATA.PROVISION_WORKERS,
+)
+#? Trims the member cache down to the members the policy keeps.
+MEMBER_CACHE = MemberCache(GROUP_STORE, BOT.get_guild, BOT_DATA.MEMBER_CACHE, BOT_DATA.MEMBER_LRU_SIZE)
+METRICS.add_collector(lambda: [
+    ('pvc_gateway_latency_seconds', BOT.latency),
+    ('pvc_role_bucket_wait_seconds', ROLE_EXECUTOR.rate_limit_wait),
+    ('pvc_groups', len(GROUP_STORE)),
+    ('pvc_guilds', len(BOT.guilds)),
+    ('pvc_cached_members', sum([len(guild.members) for guild in BOT.guilds])),
+    ('pvc_guilds_all_shards', SHARD_DIRECTORY.guild_count() if SHARD_DIRECTORY is not None else len(BOT.guilds)),
+    ('pvc_log_dropped', EVENT_LOG.dropped),
+    ('pvc_log_errors_suppressed', EVENT_LOG.suppressed),
+])
+BOT_CLOSE = BOT.close
+
+
+async def close_bot():
+    """
+    Sends the pending channel edits, then closes the bot (discord.py awaits `BOT.close` on shutdown).
+    """
+    try:
+        await CHANNEL_EDITOR.flush_all()
+    finally:
+        await BOT_CLOSE()
+
+
+BOT.close = close_bot  #? Also called by `BOT.run` when the bot is stopped.
+
+
+@BOT.before_invoke
+async def start_command_metrics(ctx):
+    ctx.metrics_started = METRICS.command_started(ctx.command.qualified_name)
+    #? Every record logged while the command runs carries its context.
+    LOG_CONTEXT.set({'guild': ctx.guild.id if ctx.guild is not None else None, 'owner': ctx.author.id, 'command': ctx.command.qualified_name})
+
+
+@BOT.after_invoke
+async def finish_command_metrics(ctx):
+    latency = METRICS.command_finished(ctx.command.qualified_name, ctx.metrics_started, ctx.command_failed)
+    if ctx.command_failed or latency >= SLOW_COMMAND_SECONDS:
+        EVENT_LOG.info('command', latency_ms=round(latency * 1000, 1), failed=ctx.command_failed)
+    else:
+        EVENT_LOG.sample('command', latency_ms=round(latency * 1000, 1), failed=False)
 
 
 @BOT.event
@@ -60,62 +223,328 @@ async def on_ready():
     )
     await BOT.change_presence(activity=activity_info, status=BOT_DATA.STATUS)
 
+    if GROUP_STORE.has_legacy():
+        #? Old database entries have no guild, find it through their role (role ids are unique across guilds).
+        role_guilds = {role.id: guild.id for guild in BOT.guilds for role in guild.roles}
+        adopted = GROUP_STORE.adopt_legacy(role_guilds, drop_unknown=SHARD_IDS is None)
+        EVENT_LOG.info('legacy_groups_migrated', adopted=adopted)
+
+    GUILD_INDEX.rebuild(BOT.guilds)
+    HELP_CACHE.build(BOT.commands, BOT_DATA.BOT_PREFIX, BOT.user.avatar_url)
+    if SHARD_DIRECTORY is not None:
+        SHARD_DIRECTORY.sync_shards(SHARD_IDS or BOT.shards.keys(), BOT.guilds)
+
+    #? Pick up the group creations / deletions a restart interrupted.
+    resumed = PROVISIONER.resume()
+    if resumed:
+        EVENT_LOG.info('provisioning_resumed', jobs=resumed)
+
+    #? Fix whatever changed while the bot was down, in the background.
+    asyncio.ensure_future(reconcile_guilds())
+
+
+def take_snapshot() -> Snapshot:
+    """
+    Captures the warm start state. The json store's groups are only included once flushed, along with
+    the database file's stamp so they are trusted on the next start only if the file did not change.
+    """
+    snapshot = Snapshot(
+        categories=CATEGORY_CACHE.dump(), guild_names=GUILD_INDEX.names(), watermarks=dict(RECONCILER.watermarks),
+        #? Only the group channels' activity is worth keeping.
+        activity={
+            channel_id: when for channel_id, when in ACTIVITY.dump().items() if GROUP_STORE.group_by_channel(channel_id) is not None
+        },
+    )
+    if isinstance(GROUP_STORE, GroupStore) and GROUP_STORE.is_flushed():
+        snapshot.groups, snapshot.members, snapshot.legacy, snapshot.unknown_members = GROUP_STORE.dump()
+        snapshot.store_stamp = file_stamp(USER_CHANNELS_JSON_PATH)
+    return snapshot
+
+
+async def snapshot_loop():
+    """
+    Writes the warm start snapshot every `snapshot_interval` seconds.
+    """
+    while True:
+        await asyncio.sleep(BOT_DATA.SNAPSHOT_INTERVAL)
+        try:
+            await GROUP_STORE.flush()
+            await asyncio.get_event_loop().run_in_executor(None, write_snapshot, SNAPSHOT_PATH, take_snapshot())
+        except Exception as e:
+            EVENT_LOG.error('snapshot_write_failed', e, path=SNAPSHOT_PATH)
+
+
+async def reconcile_guilds():
+    fixed = await RECONCILER.sweep(BOT.guilds)
+    EVENT_LOG.info('reconciled', guilds=len(BOT.guilds), fixed=fixed)
+    REAPER.schedule_guilds(BOT.guilds)
 
-def print_guilds():
-    print("********************")
-    print("Current servers: ")
-    for server in BOT.guilds:
-        print("- " + server.name)
-    print("********************")
+
+async def trim_member_cache():
+    """
+    Trims the member cache every ten minutes (`tracked` member cache policy only).
+    """
+    await BOT.wait_until_ready()
+    while not BOT.is_closed():
+        trimmed = MEMBER_CACHE.trim(BOT.guilds)
+        if trimmed:
+            EVENT_LOG.info('member_cache_trimmed', members=trimmed)
+        await asyncio.sleep(600)
+
+
+def guild_list_page(page: int) -> tuple:
+    """
+    Returns a rendered page of the guilds of every shard (only this process' guilds when not sharded),
+    the page number it was clamped to and the amount of pages.
+    """
+    if SHARD_DIRECTORY is not None:
+        page_count = max(1, -(-SHARD_DIRECTORY.guild_count() // GUILD_INDEX.page_size))
+        page = max(1, min(page, page_count))
+        return render_guild_names(SHARD_DIRECTORY.guild_names(page, GUILD_INDEX.page_size)), page, page_count
+    page_count = GUILD_INDEX.page_count()
+    page = max(1, min(page, page_count))
+    return GUILD_INDEX.page(page), page, page_count
+
+
+def summary_counts() -> dict:
+    counts = {
+        'guilds': len(BOT.guilds),
+        'groups': len(GROUP_STORE),
+        'commands': sum(METRICS.command_results.values()),
+        'command_errors': sum([count for (command, result), count in METRICS.command_results.items() if result == 'error']),
+    }
+    if SHARD_DIRECTORY is not None:
+        counts['guilds_all_shards'] = SHARD_DIRECTORY.guild_count()
+    return counts
 
 
 async def list_servers():
     """
-    This function prints the bot's connected server list every hour.
+    This function logs a summary of the bot's servers and groups every `log_summary_interval` seconds,
+    along with how much they changed since the previous summary.
     """
     await BOT.wait_until_ready()
+    last_counts = None
     while not BOT.is_closed():
-        print_guilds()
-        print(
-            "{}\nBot by Raz Kissos, helper and useful functions.\n********************\n".format(
-                DATETIME_OBJ.today()
-            )
+        counts = summary_counts()
+        deltas = dict()
+        if last_counts is not None:
+            deltas = {f"{name}_delta": value - last_counts.get(name, 0) for name, value in counts.items()}
+        EVENT_LOG.info(
+            'summary', **counts, **deltas, uptime_seconds=round((DATETIME_OBJ.now() - STARTUP_TIME).total_seconds()),
+            log_dropped=EVENT_LOG.dropped, log_errors_suppressed=EVENT_LOG.suppressed,
         )
-        await asyncio.sleep(3600) # Wait one hour.
-    print("Bot is closing...")
-    await asyncio.sleep(1)
+        last_counts = counts
+        await asyncio.sleep(BOT_DATA.LOG_SUMMARY_INTERVAL)
+    EVENT_LOG.info('bot_closing')
 
 
-async def send_success_embed(ctx: Context, title: str="Success", text: str="", footer: str = ""):
-    embed = discord.Embed(color=discord.Color.green(), title=f"✅ {title} ✅", description=text)
+#? Color and title emoji of every embed kind.
+EMBED_STYLES = {
+    'success': (discord.Color.green(), "✅"),
+    'warning': (discord.Color.dark_gold(), "⚠️"),
+    'error': (discord.Color.red(), "🛑"),
+    'pending': (discord.Color.blurple(), "⏳"),
+}
+
+
+def make_embed(kind: str, title: str, text: str = "", footer: str = "") -> discord.Embed:
+    color, emoji = EMBED_STYLES[kind]
+    embed = discord.Embed(color=color, title=f"{emoji} {title} {emoji}", description=text)
     embed.set_footer(text=footer)
-    await ctx.send(embed=embed)
+    return embed
+
+async def send_success_embed(ctx: Context, title: str="Success", text: str="", footer: str = ""):
+    return await ctx.send(embed=make_embed('success', title, text, footer))
 
 async def send_warning_embed(ctx: Context, title: str="Warning", text: str="", footer: str = ""):
-    embed = discord.Embed(color=discord.Color.dark_gold(), title= f"⚠️ {title} ⚠️", description=text)
-    embed.set_footer(text=footer)
-    await ctx.send(embed=embed)
+    return await ctx.send(embed=make_embed('warning', title, text, footer))
 
 async def send_error_embed(ctx: Context, title: str="Error", text: str="", footer: str = ""):
-    embed = discord.Embed(color=discord.Color.red(), title=f"🛑 {title} 🛑", description=text)
-    embed.set_footer(text=footer)
-    await ctx.send(embed=embed)
+    return await ctx.send(embed=make_embed('error', title, text, footer))
+
+async def send_pending_embed(ctx: Context, title: str="Working", text: str="", footer: str = ""):
+    return await ctx.send(embed=make_embed('pending', title, text, footer))
+
+
+async def edit_job_reply(guild: discord.Guild, job, kind: str, title: str, text: str):
+    """
+    Replaces a provisioning job's acknowledgement message with the job's outcome.
+    """
+    channel = guild.get_channel(job.channel_id)
+    if channel is not None:
+        await channel.get_partial_message(job.message_id).edit(embed=make_embed(kind, title, text))
+
+
+async def get_tagged_members(ctx: Context, member_tags) -> list:
+    """
+    Resolves the command's tagged members and warns about the ones that could not be found.
+    @param ctx (discord.ext.commands.Context): the command context object.
+    @param member_tags (Iterable[str]): the raw member mentions.
+    """
+    members, not_found = await resolve_members(ctx.guild, ctx.message, member_tags)
+    MEMBER_CACHE.touch(ctx.guild, members)
+    if not_found:
+        await send_warning_embed(ctx, "Member not Found", f'Could not find members with the corresponding ids {", ".join([f"`{tag}`" for tag in not_found])}!')
+    return members
+
+
+async def get_role_successes(ctx: Context, role_results: list) -> list:
+    """
+    Warns about the members whose role could not be changed and returns the ones that succeeded.
+    @param ctx (discord.ext.commands.Context): the command context object.
+    @param role_results (list): the `RoleResult`s returned by the role executor.
+    """
+    failed = [result for result in role_results if result.error is not None]
+    if failed:
+        await send_warning_embed(ctx, "Role Update Failed", '\n'.join([f'{result.member.mention}: {result.error}' for result in failed]))
+    return [result.member for result in role_results if result.error is None]
+
+
+def owner_locked(command):
+    """
+    Decorator for group commands, runs the command while holding the author's group lock
+    so commands on the same group never interleave (commands on other groups still run in parallel).
+    """
+    @functools.wraps(command)
+    async def wrapper(ctx, *args, **kwargs):
+        async with GROUP_LOCKS.hold((ctx.guild.id, ctx.author.id)):
+            return await command(ctx, *args, **kwargs)
+    return wrapper
+
+
+async def get_owner_group(ctx: Context, member_tags) -> tuple:
+    """
+    Picks the author's group a command applies to: the group whose role is mentioned first, or the author's only group.
+    Warns the author when there is no such group.
+    @param ctx (discord.ext.commands.Context): the command context object.
+    @param member_tags (Iterable[str]): the raw command arguments.
+    @return: the `(role_id, vc_id)` of the group (None if there is none) and the remaining member tags.
+    """
+    role_id, member_tags = split_role_tag(member_tags)
+    groups = GROUP_STORE.owner_groups(ctx.guild.id, ctx.author.id)
+    if role_id is not None:
+        group = next((group for group in groups if group[0] == role_id), None)
+        if group is None:
+            await send_warning_embed(ctx, "Not Your Group", f'<@&{role_id}> is not one of your private groups!')
+        return group, member_tags
+    if not groups:
+        await send_warning_embed(ctx, "No Existing Group", f'You have no existing private group! please create one!')
+        return None, member_tags
+    if len(groups) > 1:
+        await send_warning_embed(
+            ctx, "Several Groups",
+            f'You own {len(groups)} private groups, please mention the one to use first: {", ".join([f"<@&{group[0]}>" for group in groups])}!',
+            f"e.g. {BOT_DATA.BOT_PREFIX}{ctx.invoked_with} @group ...",
+        )
+        return None, member_tags
+    return groups[0], member_tags
+
+
+def in_group(role: discord.Role, member: discord.Member) -> bool:
+    """
+    Whether the member is part of the group, per the group store or the member's roles
+    (groups migrated from older databases only know their owner).
+    """
+    return GROUP_STORE.is_member(role.id, member.id) or role in member.roles
+
+
+async def get_author_member(ctx: Context) -> discord.Member:
+    """
+    Returns the command author as a guild member, only fetching it when it is not already one.
+    @param ctx (discord.ext.commands.Context): the command context object.
+    """
+    if isinstance(ctx.author, discord.Member):
+        return ctx.author
+    return await ctx.guild.fetch_member(ctx.author.id)
 
 
 @BOT.event
 async def on_command_error(ctx, error: Error):
     """
-    Excepts every error the bot receivs and prints it to the console.
+    Excepts every error the bot receivs and logs it (rate limited).
     @param ctx (discord.ext.commands.Context): the command context object.
     @param error (from discord.errors): the excepted error.
     """
-    print("[!] ERROR: {}\n{}".format(error.args, error))
+    EVENT_LOG.error(
+        'command_error', error, command=ctx.command.qualified_name if ctx.command is not None else ctx.invoked_with,
+        guild=ctx.guild.id if ctx.guild is not None else None, owner=ctx.author.id,
+    )
+    if ctx.command is not None and getattr(ctx, 'metrics_started', None) is None:
+        #? Failed its checks or argument parsing, `finish_command_metrics` never runs for it.
+        METRICS.command_results[(ctx.command.qualified_name, 'error')] += 1
+
+
+@BOT.event
+async def on_guild_channel_create(channel):
+    CATEGORY_CACHE.on_channel_create(channel)
+
+
+@BOT.event
+async def on_guild_channel_delete(channel):
+    CATEGORY_CACHE.on_channel_delete(channel)
+    CHANNEL_EDITOR.forget(channel.id)
+    ACTIVITY.forget(channel.id)
+    await RECONCILER.on_channel_delete(channel)
+
+
+@BOT.event
+async def on_guild_channel_update(before, after):
+    CATEGORY_CACHE.on_channel_update(before, after)
+
+
+@BOT.event
+async def on_guild_join(guild):
+    GUILD_INDEX.add(guild)
+    if SHARD_DIRECTORY is not None:
+        SHARD_DIRECTORY.add_guild(guild)
+
+
+@BOT.event
+async def on_guild_remove(guild):
+    CATEGORY_CACHE.forget_guild(guild.id)
+    RECONCILER.on_guild_remove(guild)
+    GUILD_INDEX.remove(guild.id)
+    if SHARD_DIRECTORY is not None:
+        SHARD_DIRECTORY.remove_guild(guild.id)
+
+
+@BOT.event
+async def on_guild_update(before, after):
+    if before.name != after.name:
+        GUILD_INDEX.add(after)
+        if SHARD_DIRECTORY is not None:
+            SHARD_DIRECTORY.add_guild(after)
+
+
+@BOT.event
+async def on_guild_role_delete(role):
+    await RECONCILER.on_role_delete(role)
+
+
+@BOT.event
+async def on_member_update(before, after):
+    #? Keep the group members in sync with the roles changed by hand (needs the members intent).
+    if before.roles == after.roles:
+        return
+    before_ids, after_ids = {role.id for role in before.roles}, {role.id for role in after.roles}
+    for role_id in after_ids - before_ids:
+        if GROUP_STORE.get_group(role_id) is not None and not GROUP_STORE.is_member(role_id, after.id):
+            GROUP_STORE.add_members(role_id, [after.id])
+    for role_id in before_ids - after_ids:
+        if GROUP_STORE.is_member(role_id, after.id):
+            GROUP_STORE.remove_members(role_id, [after.id])
 
 
-#? Create Asynchronous tasks for the bot before running:
-asyncio.ensure_future(
-    list_servers()
-)  #? Run the `list_servers` function as an asynchronous coroutine.
+@BOT.event
+async def on_voice_state_update(member, before, after):
+    REAPER.on_voice_state_update(member, before, after)
+    ACTIVITY.on_voice_state_update(member, before, after)
+    if before.channel != after.channel:
+        EVENT_LOG.sample(
+            'voice_move', guild=member.guild.id, member=member.id,
+            before=before.channel.id if before.channel is not None else None, after=after.channel.id if after.channel is not None else None,
+        )
 
 
 @BOT.command(
@@ -123,70 +552,28 @@ asyncio.ensure_future(
     aliases=["h"],
     brief="Shows the help message.\nAlso can be used as a single command help message.",
     description="When sent with no arguments, the command simply prints out all the command names and their brief explanations. But when sending a command name as an argument the command will print out a full list of the command's fields.",
-    usage=f"| **{BOT_DATA.BOT_PREFIX}help** -> print out the full list of commands.\n| **{BOT_DATA.BOT_PREFIX}help <command name>** - > print out thorough description of the command with the matching name",
+    usage=f"| **{BOT_DATA.BOT_PREFIX}help** -> print out the full list of commands.\n| **{BOT_DATA.BOT_PREFIX}help <page>** -> print out a page of the list of commands.\n| **{BOT_DATA.BOT_PREFIX}help <command name>** - > print out thorough description of the command with the matching name",
 )
 async def help(ctx, command_name: str = None):
     """
     This command replaces the default help command from discord and sends a prettier and formatted help message.
     @param ctx (discord.ext.commands.Context): the command context object.
-    @param command_name (str): the command name to get data about (optional).
-    """
-
-    if command_name is None:  # Check if help was invoked as a specific command help.
-        # Create return embed
-        author = ctx.message.author
-        embed = discord.Embed(color=discord.Color.gold())
-        embed.set_thumbnail(url=BOT.user.avatar_url)
-        embed.set_footer(text="Senior Bot's Commands")
-
-        for cmd in BOT.commands:
-            embed.add_field(
-                name=str(f"♿|**{BOT_DATA.BOT_PREFIX}{cmd.name}**: "),
-                value=str(f"❓ {cmd.brief}"),
-                inline=False,
-            )
+    @param command_name (str): the command name (or alias) to get data about, or an overview page number (optional).
+    """
+
+    if not HELP_CACHE.is_built():
+        HELP_CACHE.build(BOT.commands, BOT_DATA.BOT_PREFIX, BOT.user.avatar_url)
+
+    if command_name is None or command_name.isdigit():  # Check if help was invoked as a specific command help.
         await ctx.send(
-            embed=embed
+            embed=HELP_CACHE.overview(int(command_name or 1))
         )  # Send the shallow info of each command as an embed.
     else:  # Help command was invoked as a specific command help.
-        # Check if command name is actually a command.
-        if command_name in [command.name for command in BOT.commands]:
-            # Get the requested command object.
-            cmd_to_print = None
-            for cmd in BOT.commands:
-                if cmd.name == command_name:
-                    cmd_to_print = cmd
-                    break
-
-            # Check if command has any aliases, if not return 'None'.
-            if len(cmd_to_print.aliases) == 0:
-                aliases_str = "None"
-            else:
-                aliases_str = ", ".join(
-                    [f'"{alias}"' for alias in cmd_to_print.aliases]
-                )
-
-            # Create and send the thorough command info embed.
-            embed = discord.Embed(color=discord.Color.dark_orange())
-            embed.set_footer(text=f'"{cmd_to_print.name}" thorough description')
-            embed.add_field(
-                name="💬 Command Name 💬", value=cmd_to_print.name, inline=False
-            )
-            embed.add_field(
-                name="❓ Brief Explanation ❓", value=cmd_to_print.brief, inline=False
-            )
-            embed.add_field(
-                name="📰 Description 📰", value=cmd_to_print.description, inline=False
-            )
-            embed.add_field(
-                name="⚙ Command Usage ⚙", value=cmd_to_print.usage, inline=False
-            )
-            embed.add_field(
-                name="🎭 Command Name Aliases 🎭", value=aliases_str, inline=False
-            )
+        embed = HELP_CACHE.details(command_name)
+        if embed is not None:  # Check if command name (or alias) is actually a command.
             await ctx.channel.send(embed=embed)
         else:  # Command name was not found in the bot's commands.
-            await ctx.channel.send(f"No command named {command} was found!")
+            await ctx.channel.send(f"No command named {command_name} was found!")
 
 
 @BOT.command(
@@ -194,14 +581,14 @@ async def help(ctx, command_name: str = None):
     aliases=["bot"],
     brief="Shows general information about the bot.",
     description="Shows the bot information (startup time, github page, etc...).",
-    usage=f"| **{BOT_DATA.BOT_PREFIX}botinfo** -> will print an embed with the general bot information.",
+    usage=f"| **{BOT_DATA.BOT_PREFIX}botinfo** -> will print an embed with the general bot information.\n| **{BOT_DATA.BOT_PREFIX}botinfo <page>** -> will print another page of the guild list.",
 )
-async def botinfo(ctx):
+async def botinfo(ctx, page: int = 1):
     """
     This command sends an embed to the context's channel which will contain general bot information.
     @param ctx (discord.ext.commands.Context): the command context object.
+    @param page (int): the page of the guild list to show (optional).
     """
-    print(STARTUP_TIME)
     embed_ret = discord.Embed(colour=discord.Color.green(), timestamp=ctx.message.created_at, title=f"Bot Info")
     embed_ret.set_thumbnail(url=BOT.user.avatar_url)
     embed_ret.add_field(name="❓ Name ❔", value=BOT.user.name)
@@ -215,11 +602,189 @@ async def botinfo(ctx):
         return fmt.format(**d)
     
     embed_ret.add_field(name="🕗 Total Runtime 🕑", value=strfdelta((DATETIME_OBJ.now() - STARTUP_TIME), "{days} days {hours}:{minutes}:{seconds}"), inline=False)
-    embed_ret.add_field(name="🌍 All Guilds 🌎", value='\n'.join([str('- ' + guild.name) for guild in BOT.guilds]), inline=False)
+    guild_page, page, page_count = guild_list_page(page)
+    embed_ret.add_field(name=f"🌍 All Guilds ({page}/{page_count}) 🌎", value=guild_page, inline=False)
+    if SHARD_DIRECTORY is not None:
+        embed_ret.add_field(name="🧩 Shards 🧩", value=f"{SHARD_DIRECTORY.shard_count()} shards, this one is #{ctx.guild.shard_id if ctx.guild else 0}", inline=False)
     embed_ret.set_footer(text="Bot Information")
     await ctx.channel.send(embed=embed_ret)  # Send the embed.
 
 
+@BOT.command(
+    name="stats",
+    aliases=["metrics"],
+    brief="Shows the bot's performance statistics (admins only).",
+    description="Shows per-command latency percentiles and outcomes, the busiest REST routes, rate-limit waits, store flush timings and the gateway latency.",
+    usage=f"| **{BOT_DATA.BOT_PREFIX}stats** -> will print an embed with the bot's performance statistics.",
+)
+@commands.has_permissions(administrator=True)
+async def stats(ctx):
+    """
+    This command sends an embed with the bot's metrics to the context's channel.
+    @param ctx (discord.ext.commands.Context): the command context object.
+    """
+    embed_ret = discord.Embed(colour=discord.Color.blue(), timestamp=ctx.message.created_at, title="Bot Stats")
+    for name, hist in sorted(METRICS.command_latency.items()):
+        errors = METRICS.command_results[(name, 'error')]
+        embed_ret.add_field(
+            name=f"⏱ {name} ⏱",
+            value=f"{hist.count} runs, {errors} errors\np50 {hist.quantile(0.5) * 1000:.0f}ms, p99 {hist.quantile(0.99) * 1000:.0f}ms",
+        )
+
+    route_calls = dict()
+    for (command, route), count in METRICS.rest_calls.items():
+        route_calls[route] = route_calls.get(route, 0) + count
+    busiest = sorted(route_calls.items(), key=lambda item: item[1], reverse=True)[:5]
+    embed_ret.add_field(
+        name="🌐 Busiest REST Routes 🌐",
+        value='\n'.join([f"`{route}`: {count}" for route, count in busiest]) or "None",
+        inline=False,
+    )
+    embed_ret.add_field(
+        name="🚦 Rate Limits 🚦",
+        value=f"{METRICS.rate_limited} 429s, {METRICS.rate_limit_wait:.2f}s retrying\n{ROLE_EXECUTOR.rate_limit_wait:.2f}s in role buckets",
+    )
+    embed_ret.add_field(
+        name="💾 Store 💾",
+        value=f"{len(GROUP_STORE)} groups, loaded in {METRICS.store_load_seconds * 1000:.0f}ms\n"
+              f"{METRICS.store_flush.count} flushes, p99 {METRICS.store_flush.quantile(0.99) * 1000:.0f}ms",
+    )
+    embed_ret.add_field(name="💓 Gateway Latency 💓", value=f"{BOT.latency * 1000:.0f}ms")
+    embed_ret.set_footer(text="Bot Stats")
+    await ctx.channel.send(embed=embed_ret)
+
+
+@BOT.command(
+    name="cache_stats",
+    aliases=["memory"],
+    brief="Shows the member cache's memory footprint (admins only).",
+    description="Shows the member cache policy, the amount of cached members and users and their estimated memory footprint.",
+    usage=f"| **{BOT_DATA.BOT_PREFIX}cache_stats** -> will print an embed with the member cache's statistics.",
+)
+@commands.has_permissions(administrator=True)
+async def cache_stats(ctx):
+    """
+    This command sends an embed with the member cache's footprint to the context's channel.
+    @param ctx (discord.ext.commands.Context): the command context object.
+    """
+    member_count, member_bytes = MEMBER_CACHE.footprint(BOT.guilds)
+    embed_ret = discord.Embed(colour=discord.Color.blue(), timestamp=ctx.message.created_at, title="Member Cache")
+    embed_ret.add_field(name="⚙ Policy ⚙", value=f"`{MEMBER_CACHE.policy}`, intents value {BOT.intents.value}")
+    embed_ret.add_field(name="👥 Cached Members 👥", value=f"{member_count} (~{member_bytes / 2 ** 20:.1f}MiB)")
+    embed_ret.add_field(name="👤 Cached Users 👤", value=str(len(BOT.users)))
+    embed_ret.add_field(
+        name="🧹 Trimming 🧹",
+        value=f"{MEMBER_CACHE.recent_count()}/{MEMBER_CACHE.lru_size} recently mentioned, {MEMBER_CACHE.trimmed} trimmed so far",
+    )
+    embed_ret.set_footer(text="Member Cache Stats")
+    await ctx.send(embed=embed_ret)
+
+
+@BOT.command(
+    name="list_pvcs",
+    aliases=["groups"],
+    brief="Lists the server's private groups (admins only).",
+    description="Lists every private group of the server with its owner, member count and last voice activity, least recently active first.",
+    usage=f"| **{BOT_DATA.BOT_PREFIX}list_pvcs** -> will print the first page of the server's private groups.\n| **{BOT_DATA.BOT_PREFIX}list_pvcs <page>** -> will print a page of the server's private groups.",
+)
+@commands.has_permissions(administrator=True)
+async def list_pvcs(ctx, page: int = 1):
+    """
+    This command sends a page of the guild's private groups to the context's channel.
+    @param ctx (discord.ext.commands.Context): the command context object.
+    @param page (int): the page of the group list to show.
+    """
+    infos = await collect_groups(GROUP_STORE, ctx.guild, ACTIVITY)
+    page_count = max(1, -(-len(infos) // GROUPS_PER_PAGE))
+    page = max(1, min(page, page_count))
+    now = DATETIME_OBJ.now().timestamp()
+
+    embed_ret = discord.Embed(colour=discord.Color.blue(), timestamp=ctx.message.created_at, title="Private Groups")
+    for info in infos[(page - 1) * GROUPS_PER_PAGE:page * GROUPS_PER_PAGE]:
+        if info.role is None or info.vc is None:
+            value = "⚠️ broken (role or channel missing)"
+        else:
+            value = f"{info.role.mention}, {info.member_count} members\nlast active: {format_age(now - info.last_active)}"
+            if not info.activity_known:
+                value += " (none seen since the bot started)"
+        embed_ret.add_field(name=f"👑 {info.vc.name if info.vc else info.owner_id} 👑", value=f"<@{info.owner_id}>\n{value}", inline=False)
+    embed_ret.set_footer(text=f"{len(infos)} groups ({page}/{page_count})")
+    await ctx.send(embed=embed_ret)
+
+
+@BOT.command(
+    name="audit_pvcs",
+    aliases=["audit"],
+    brief="Audits the server's private groups (admins only).",
+    description="Counts the server's private groups that are idle, broken (role or channel missing) or whose owner left the server.",
+    usage=f"| **{BOT_DATA.BOT_PREFIX}audit_pvcs** -> will audit the server's private groups (idle after 24 hours).\n| **{BOT_DATA.BOT_PREFIX}audit_pvcs <idle hours>** -> will audit the server's private groups, idle after the given amount of hours.",
+)
+@commands.has_permissions(administrator=True)
+async def audit_pvcs(ctx, idle_hours: float = 24.0):
+    """
+    This command sends an audit of the guild's private groups to the context's channel.
+    @param ctx (discord.ext.commands.Context): the command context object.
+    @param idle_hours (float): hours without voice activity after which a group is idle.
+    """
+    infos = await collect_groups(GROUP_STORE, ctx.guild, ACTIVITY, check_owners=True)
+    now = DATETIME_OBJ.now().timestamp()
+    counts = {
+        group_filter: len([info for info in infos if match_group(info, group_filter, idle_hours * 3600, now)])
+        for group_filter in GROUP_FILTERS
+    }
+    text = (
+        f"{counts['all']} groups\n💤 {counts['idle']} idle for {idle_hours:g}h or more\n"
+        f"⚠️ {counts['orphaned']} broken (role or channel missing)\n🚪 {counts['left']} whose owner left the server"
+    )
+    unknown_activity = len([info for info in infos if not info.activity_known])
+    if unknown_activity:
+        text += f"\nℹ️ {unknown_activity} without voice activity seen since the bot started, idle counted from the start"
+    await send_success_embed(
+        ctx, "Private Groups Audit", text,
+        f"Use {BOT_DATA.BOT_PREFIX}purge_pvcs <{'|'.join(GROUP_FILTERS)}> to delete them.",
+    )
+
+
+@BOT.command(
+    name="purge_pvcs",
+    aliases=["mass_purge"],
+    brief="Deletes many private groups at once (admins only).",
+    description=f"Deletes the server's private groups matching a filter: `idle` (no voice activity for a while), `orphaned` (role or channel missing), `left` (owner left the server) or `all`.",
+    usage=f"| **{BOT_DATA.BOT_PREFIX}purge_pvcs <{'|'.join(GROUP_FILTERS)}>** -> will delete the matching private groups (idle after 24 hours).\n| **{BOT_DATA.BOT_PREFIX}purge_pvcs idle <idle hours>** -> will delete the groups idle for the given amount of hours.",
+)
+@commands.has_permissions(administrator=True)
+async def purge_pvcs(ctx, group_filter: str, idle_hours: float = 24.0):
+    """
+    This command deletes the guild's private groups matching the filter, reporting its progress.
+    @param ctx (discord.ext.commands.Context): the command context object.
+    @param group_filter (str): which groups to delete.
+    @param idle_hours (float): hours without voice activity after which a group is idle.
+    """
+    group_filter = group_filter.lower()
+    if group_filter not in GROUP_FILTERS:
+        await send_warning_embed(ctx, "Unknown Filter", f"The filter must be one of {', '.join(GROUP_FILTERS)}!")
+        return
+
+    guild: discord.Guild = ctx.guild
+    now = DATETIME_OBJ.now().timestamp()
+    infos = await collect_groups(GROUP_STORE, guild, ACTIVITY, check_owners=group_filter == 'left')
+    infos = [info for info in infos if match_group(info, group_filter, idle_hours * 3600, now)]
+    if not infos:
+        await send_warning_embed(ctx, "Nothing to Delete", f"No private group matches the `{group_filter}` filter!")
+        return
+
+    progress_message = await send_pending_embed(ctx, "Deleting Groups", f"Deleting {len(infos)} private groups...")
+
+    async def report_progress(done: int, total: int):
+        await progress_message.edit(embed=make_embed('pending', "Deleting Groups", f"Deleted {done}/{total} private groups..."))
+
+    purged, failed = await bulk_purge(GROUP_STORE, GROUP_LOCKS, PURGE_EXECUTOR, guild, infos, report_progress)
+    text = f"Deleted {purged} private groups."
+    if failed:
+        text += f"\n{failed} roles / channels could not be deleted, please remove them by hand."
+    await progress_message.edit(embed=make_embed('success', "Groups Deleted Successfully", text))
+
+
 @BOT.command(
     name="create_pvc",
     aliases=['create', 'pvc'],
@@ -227,113 +792,66 @@ async def botinfo(ctx):
     description="Creates a private voice channel.",
     usage=f"| **{BOT_DATA.BOT_PREFIX}create_pvc @member1 @member2 ...** -> will create a private voice channel on the `private voice channels` category on the server."
     )
+@owner_locked
 async def create_pvc(ctx, *member_tags):
     guild: discord.Guild = ctx.guild
-    categories: list = guild.categories
-    pvc_category: discord.CategoryChannel = None
-    for category in categories:
-        if category.name == '🔒private voice channels🔒':
-            pvc_category = category
-    
-    if pvc_category is None:
-        pvc_category = await guild.create_category('🔒private voice channels🔒')
+    author_member_obj: discord.Member = await get_author_member(ctx)
 
-    author_member_obj: discord.Member = await guild.fetch_member(int(ctx.message.author.id))
+    if PROVISIONER.is_pending(guild.id, author_member_obj.id):
+        await send_warning_embed(ctx, 'Group Being Updated', 'Your private group is still being created or deleted, please wait a moment!')
+        return
 
-    with open(USER_CHANNELS_JSON_PATH, 'r') as f:
-        json_obj: dict = json.loads(f.read())
-    
-    author_data: tuple = json_obj.get(str(author_member_obj.id), None)
-    if author_data is not None:
-        #? Author already has an existing group.
-        existing_role: discord.Role = guild.get_role(int(author_data[0]))
-        existing_group: discord.VoiceChannel = guild.get_channel(int(author_data[1]))
+    author_groups = list()
+    for role_id, vc_id in GROUP_STORE.owner_groups(guild.id, author_member_obj.id):
+        existing_role: discord.Role = guild.get_role(role_id)
+        existing_group: discord.VoiceChannel = guild.get_channel(vc_id)
         if existing_role is not None and existing_group is not None:
-            await send_warning_embed(ctx, 'Group Already Exists', f'You already have an existing group named {existing_role.mention} with a correspoding private vc named {existing_group.name}!')
-            return
+            author_groups.append(existing_role)
         else:
-            await send_error_embed(ctx, "Database Error", f'Deleting your existing group due to database error (you have probably deleted your role manually)!\nPlease make sure to delete all instances of the group (role and vc) or contact your administrator!\nCreating new group...')
+            await send_error_embed(ctx, "Database Error", f'Deleting one of your existing groups due to database error (you have probably deleted its role manually)!\nPlease make sure to delete all instances of the group (role and vc) or contact your administrator!')
 
-            #? Update the json database.
-            with open(USER_CHANNELS_JSON_PATH, 'w') as f:
-                del json_obj[str(author_member_obj.id)]
-                f.write(json.dumps(json_obj))
+            #? Update the group store.
+            GROUP_STORE.delete(role_id)
 
-    
-    #> If we reach this point then the author does not have an existing group.
+    if len(author_groups) >= BOT_DATA.MAX_GROUPS_PER_OWNER:
+        await send_warning_embed(ctx, 'Too Many Groups', f'You already own {len(author_groups)} private groups ({", ".join([role.mention for role in author_groups])}), please delete one first!')
+        return
+
+    #> If we reach this point then the author may create another group.
 
     #? Fetch tagged members and add them to the group.
-    tagged_members = list()
-    for member_tag in member_tags:
-        member_id: str = member_tag[3:-1]
-        member_obj: discord.Member = await guild.fetch_member(int(member_id))
-        if member_obj is None:
-            await send_warning_embed(ctx, "Member not Found", f'Could not find member with the corresponding id `{member_id}`!')
-            continue
-        tagged_members.append(member_obj)
+    tagged_members = await get_tagged_members(ctx, member_tags)
     
-    #? Add author just in case and convert to set to get rid of duplicates.
-    tagged_members.append(author_member_obj)
-    tagged_members = list(set(tagged_members))
-
-    #? Create new private role and assign to group members.
-    new_role: discord.Role = await guild.create_role(name=f"{ctx.author.name}'s Private Group", mentionable=True, colour=discord.Color.random())
-    for member in tagged_members:
-        await member.add_roles(new_role)
-
-    #? Create vc permissions to only allow the role's members to connect.
-    everyone_perms = {'connect': False, 'speak': False}
-    role_perms = {'connect': True, 'speak': True}
-    overwrites = {
-        guild.default_role : discord.PermissionOverwrite(**everyone_perms),
-        new_role: discord.PermissionOverwrite(**role_perms)
-    }
-    vc:discord.VoiceChannel = await pvc_category.create_voice_channel(f"{ctx.author.name}'s Private Voice Channel", user_limit=len(tagged_members), overwrites=overwrites)
+    #? Add author just in case and get rid of duplicates.
+    member_ids = list(dict.fromkeys([member.id for member in tagged_members] + [author_member_obj.id]))
 
-    #? Save new info to json database.
-    json_obj[str(author_member_obj.id)] = (str(new_role.id), str(vc.id))
-    with open(USER_CHANNELS_JSON_PATH, 'w') as f:
-        f.write(json.dumps(json_obj))
-    
-    await send_success_embed(ctx, "Group Created Successfully", f'Successfully created a private voice channel {vc.name} for members {", ".join([member.mention for member in tagged_members])}!')
+    #? Acknowledge right away, the role, its assignments and the vc are created in the background.
+    ack = await send_pending_embed(ctx, "Creating Group", f'Creating a private voice channel for members {", ".join([f"<@{member_id}>" for member_id in member_ids])}...')
+    PROVISIONER.submit_create(guild.id, author_member_obj.id, ctx.author.name, member_ids, ack.channel.id, ack.id)
 
 @BOT.command(
     name="purge_pvc",
     aliases=['purge', 'yeet'],
     brief="Delete a private voice channel that belongs to you.",
     description="Deletes a user's private voice channel.",
-    usage=f"| **{BOT_DATA.BOT_PREFIX}purge_pvc** -> will delete the author's private voice channel from the server and delete the role related to it."
+    usage=f"| **{BOT_DATA.BOT_PREFIX}purge_pvc** -> will delete the author's private voice channel from the server and delete the role related to it.\n| **{BOT_DATA.BOT_PREFIX}purge_pvc @group** -> will delete one of the author's private groups."
     )
-async def purge_pvc(ctx):
+@owner_locked
+async def purge_pvc(ctx, *group_tags):
     guild: discord.Guild = ctx.guild
-    author_member_obj: discord.Member = await guild.fetch_member(int(ctx.message.author.id))
-    with open(USER_CHANNELS_JSON_PATH, 'r') as f:
-        json_obj: dict = json.loads(f.read())
-    
-    author_data: tuple = json_obj.get(str(author_member_obj.id), None)
-    if author_data is None:
-        #? Author has no existing group.
-        await send_warning_embed(ctx, "No Existing Group", f'You have no existing private group in the database!')
+    author_member_obj: discord.Member = await get_author_member(ctx)
+    if PROVISIONER.is_pending(guild.id, author_member_obj.id):
+        await send_warning_embed(ctx, 'Group Being Updated', 'Your private group is still being created or deleted, please wait a moment!')
         return
-    
-    existing_role: discord.Role = guild.get_role(int(author_data[0]))
-    existing_vc: discord.VoiceChannel = guild.get_channel(int(author_data[1]))
 
-    if existing_role and existing_vc:
-        #? Delete the user's private group's role and vc.
-        await existing_role.delete()
-        await existing_vc.delete()
-    else:
-        await send_error_embed(ctx, "Currupted Database", f'An error occured in the database, deleting information from the database! Please contanct your admin or remove the problematic group by hand!')
-    
-    #> If we have reached this point then we know the author has an existing group.
-    
-    #? Update the json database.
-    with open(USER_CHANNELS_JSON_PATH, 'w') as f:
-        del json_obj[str(author_member_obj.id)]
-        f.write(json.dumps(json_obj))
+    author_data, group_tags = await get_owner_group(ctx, group_tags)
+    if author_data is None:
+        #? Author has no existing group (or did not pick one).
+        return
 
-    await send_success_embed(ctx, "Group Deleted Successfully", "The private group was successfully deleted!")
+    #? Acknowledge right away, the user's private group's role, vc and store entry are deleted in the background.
+    ack = await send_pending_embed(ctx, "Deleting Group", f"Deleting your private group <@&{author_data[0]}>...")
+    PROVISIONER.submit_purge(guild.id, author_member_obj.id, author_data[0], ack.channel.id, ack.id)
 
 
 @BOT.command(
@@ -341,51 +859,37 @@ async def purge_pvc(ctx):
     aliases=['add'],
     brief="Add members to your private voice channel.",
     description="Adds members to a private voice channel.",
-    usage=f"| **{BOT_DATA.BOT_PREFIX}add_members @member1 @member2 ...** -> will add the list of tagged members to the owner's private voice channel."
+    usage=f"| **{BOT_DATA.BOT_PREFIX}add_members @member1 @member2 ...** -> will add the list of tagged members to the owner's private voice channel.\n| **{BOT_DATA.BOT_PREFIX}add_members @group @member1 @member2 ...** -> will add the list of tagged members to one of the owner's private groups."
     )
+@owner_locked
 async def add_members(ctx, *member_tags):
     guild: discord.Guild = ctx.guild
 
-    with open(USER_CHANNELS_JSON_PATH, 'r') as f:
-        json_obj: dict = json.loads(f.read())
-    
-    author_data: tuple = json_obj.get(str(ctx.author.id), None)
+    author_data, member_tags = await get_owner_group(ctx, member_tags)
     if author_data is not None:
         #? Author already has an existing group.
         existing_role: discord.Role = guild.get_role(int(author_data[0]))
         existing_group: discord.VoiceChannel = guild.get_channel(int(author_data[1]))
         if existing_role is not None and existing_group is not None:
             #? Fetch tagged members and add them to the group.
-            tagged_members = list()
-            for member_tag in set(member_tags):
-                member_id: str = member_tag[3:-1]
-                try:
-                    member_obj: discord.Member = await guild.fetch_member(int(member_id))
-                except Exception as e:
-                    #! We tried to fetch a bot or a non existant user.
-                    await send_warning_embed(ctx, "Member not Found", f'Could not find member with the corresponding id `{member_id}`!')
-                    continue
-                if existing_role not in member_obj.roles:
-                    await member_obj.add_roles(existing_role)
-                    tagged_members.append(member_obj)
+            new_members = list()
+            for member_obj in await get_tagged_members(ctx, member_tags):
+                if not in_group(existing_role, member_obj):
+                    new_members.append(member_obj)
                 else:
                     await send_warning_embed(ctx, "Member Already in Group", f'{member_obj.mention} is already in the private group {existing_role.mention}!')
                     continue
-            
-            await existing_group.edit(user_limit = existing_group.user_limit + len(tagged_members))
+            tagged_members = await get_role_successes(ctx, await ROLE_EXECUTOR.add_role(guild, new_members, existing_role))
+            GROUP_STORE.add_members(existing_role.id, [member.id for member in tagged_members])
+
+            CHANNEL_EDITOR.update_members(existing_group, existing_role, added_ids=[member.id for member in tagged_members])
             await send_success_embed(ctx, "Members Added Successfully", f'Successfully added members {", ".join([member.mention for member in tagged_members])} to the private voice channel {existing_group.name}!')
             return
         else:
             await send_error_embed(ctx, "Database Error", f'Please make sure to delete all instances of the group (role and vc) or contact your administrator!\nPlease create a new private group!', "You have probably deleted your role manually")
 
-            #? Update the json database.
-            with open(USER_CHANNELS_JSON_PATH, 'w') as f:
-                del json_obj[str(ctx.author.id)]
-                f.write(json.dumps(json_obj))
-            
-            return
-    else:
-            send_warning_embed(ctx, "No Existing Group", f'You have no existing private group! please create one!')
+            #? Update the group store.
+            GROUP_STORE.delete(author_data[0])
             return
 
 
@@ -394,48 +898,108 @@ async def add_members(ctx, *member_tags):
     aliases=['remove', 'kick'],
     brief="Remove members from your private voice channel.",
     description="Removes members from a private voice channel.",
-    usage=f"| **{BOT_DATA.BOT_PREFIX}remove_members @member1 @member2 ...** -> will remove the list of tagged members from the owner's private voice channel."
+    usage=f"| **{BOT_DATA.BOT_PREFIX}remove_members @member1 @member2 ...** -> will remove the list of tagged members from the owner's private voice channel.\n| **{BOT_DATA.BOT_PREFIX}remove_members @group @member1 @member2 ...** -> will remove the list of tagged members from one of the owner's private groups."
     )
+@owner_locked
 async def remove_members(ctx, *member_tags):
     guild: discord.Guild = ctx.guild
 
-    with open(USER_CHANNELS_JSON_PATH, 'r') as f:
-        json_obj: dict = json.loads(f.read())
-    
-    author_data: tuple = json_obj.get(str(ctx.author.id), None)
+    author_data, member_tags = await get_owner_group(ctx, member_tags)
     if author_data is not None:
         #? Author already has an existing group.
         existing_role: discord.Role = guild.get_role(int(author_data[0]))
         existing_group: discord.VoiceChannel = guild.get_channel(int(author_data[1]))
         if existing_role is not None and existing_group is not None:
             #? Fetch tagged members and add them to the group.
-            tagged_members = list()
-            for member_tag in set(member_tags):
-                member_id: str = member_tag[3:-1]
-                try:
-                    member_obj: discord.Member = await guild.fetch_member(int(member_id))
-                except Exception as e:
-                    #! We tried to fetch a bot or a non existant user.
-                    await send_warning_embed(ctx, "Member not Found", f'Could not find member with the corresponding id `{member_id}`!')
-                    continue
-                if existing_role in member_obj.roles:
-                    await member_obj.remove_roles(existing_role)
-                    tagged_members.append(member_obj)
+            group_members = list()
+            for member_obj in await get_tagged_members(ctx, member_tags):
+                if in_group(existing_role, member_obj):
+                    group_members.append(member_obj)
                 else:
                     await send_warning_embed(ctx, "Member Not in Group", f'{member_obj.mention} is not in the private group {existing_role.mention}!')
                     continue
-            
+            tagged_members = await get_role_successes(ctx, await ROLE_EXECUTOR.remove_role(guild, group_members, existing_role))
+            GROUP_STORE.remove_members(existing_role.id, [member.id for member in tagged_members])
+
             if len(tagged_members) == 0:
                 await send_error_embed(ctx, "Not Successful", f'Could not remove any members from the private voice channel {existing_group.name}!')
-            elif (existing_group.user_limit - len(tagged_members)) > 0:
-                await existing_group.edit(user_limit = existing_group.user_limit - len(tagged_members))
-                await send_success_embed(ctx, "Members Removed Successfully", f'Successfully removed members {", ".join([member.mention for member in tagged_members])} from the private voice channel {existing_group.name}!')
             else:
-                await send_error_embed(ctx, "Error", "Please contact your administrator or try again later.")
+                CHANNEL_EDITOR.update_members(existing_group, existing_role, removed_ids=[member.id for member in tagged_members])
+                await send_success_embed(ctx, "Members Removed Successfully", f'Successfully removed members {", ".join([member.mention for member in tagged_members])} from the private voice channel {existing_group.name}!')
             return
         else:
             await send_warning_embed(ctx, "No Existing Group", f'You have no existing private group! please create one!')
             return
 
-#> Finally, Run the Bot!
-BOT.run(BOT_DATA.TOKEN)
\ No newline at end of file
+
+@BOT.command(
+    name="my_groups",
+    aliases=['mine', 'my_pvcs'],
+    brief="Lists the private groups you are part of.",
+    description="Lists every private group of the server you own or are a member of.",
+    usage=f"| **{BOT_DATA.BOT_PREFIX}my_groups** -> will print the private groups the author is part of."
+    )
+async def my_groups(ctx):
+    """
+    This command sends the private groups the author owns or is a member of to the context's channel.
+    @param ctx (discord.ext.commands.Context): the command context object.
+    """
+    guild: discord.Guild = ctx.guild
+    owned_ids = [role_id for role_id, vc_id in GROUP_STORE.owner_groups(guild.id, ctx.author.id)]
+    role_ids = list(dict.fromkeys(owned_ids + GROUP_STORE.member_groups(guild.id, ctx.author.id)))
+    if not role_ids:
+        await send_warning_embed(ctx, "No Groups", f'You are not part of any private group!')
+        return
+
+    embed_ret = discord.Embed(colour=discord.Color.blue(), timestamp=ctx.message.created_at, title="Your Private Groups")
+    for role_id in role_ids:
+        group = GROUP_STORE.get_group(role_id)
+        if group is None:
+            continue
+        vc = guild.get_channel(group[2])
+        embed_ret.add_field(
+            name=f"{'👑 ' if role_id in owned_ids else ''}{vc.name if vc is not None else 'missing channel'}",
+            value=f"<@&{role_id}>\nowner: <@{group[1]}>",
+            inline=False,
+        )
+    embed_ret.set_footer(text=f"{len(role_ids)} groups, 👑 owned by you")
+    await ctx.send(embed=embed_ret)
+
+if __name__ == "__main__":
+    #? Create Asynchronous tasks for the bot before running:
+    asyncio.ensure_future(
+        list_servers()
+    )  #? Periodically log a summary of the bot's servers and groups.
+    asyncio.ensure_future(
+        GROUP_STORE.flush_loop()
+    )  #? Periodically write the group store's changes back to the json database.
+    asyncio.ensure_future(
+        REAPER.run()
+    )  #? Delete idle private groups once their countdown runs out.
+    PROVISIONER.start()  #? Start the background group creation / deletion workers.
+    asyncio.ensure_future(
+        trim_member_cache()
+    )  #? Keep the member cache within its policy.
+    if BOT_DATA.SNAPSHOT_INTERVAL > 0:
+        asyncio.ensure_future(
+            snapshot_loop()
+        )  #? Periodically write the warm start snapshot.
+    if METRICS_PORT:
+        asyncio.ensure_future(
+            METRICS.serve(BOT_DATA.METRICS_HOST, METRICS_PORT)
+        )  #? Serve the metrics in the Prometheus text format.
+
+    #> Finally, Run the Bot!
+    try:
+        BOT.run(BOT_DATA.TOKEN)
+        #? The event loop is closed by now, write whatever is left in the group store synchronously.
+        GROUP_STORE.flush_sync()
+        if BOT_DATA.SNAPSHOT_INTERVAL > 0:
+            write_snapshot(SNAPSHOT_PATH, take_snapshot())
+    finally:
+        #? Close the stores last, the snapshot reads the group store.
+        GROUP_STORE.close()
+        if SHARD_DIRECTORY is not None:
+            SHARD_DIRECTORY.close()
+        OUTBOX.close()
+        EVENT_LOG.stop()  #? Write the records still queued.
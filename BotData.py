@@ -1,4 +1,4 @@
-from discord import Status
+from discord import Intents, Status
 import configparser
 import os
 
@@ -7,6 +7,28 @@ class BotData:
     TOKEN = str()
     BOT_PREFIX = str()
     STATUS = Status.online
+    STORE_FLUSH_INTERVAL = 5.0
+    STORE_FLUSH_THRESHOLD = 50
+    STORE_BACKEND = 'json'
+    STORE_PATH = 'user_channels.db'
+    PVC_IDLE_TTL = 0.0
+    CHANNEL_EDIT_WINDOW = 1.0
+    SNAPSHOT_PATH = 'warm_start.snapshot'
+    SNAPSHOT_INTERVAL = 300.0
+    METRICS_HOST = '127.0.0.1'
+    METRICS_PORT = 0
+    SHARD_COUNT = 0  #? 0 runs unsharded, -1 lets Discord pick the shard count.
+    SHARD_PROCESSES = 1
+    OUTBOX_PATH = 'provisioning.db'
+    PROVISION_WORKERS = 4
+    INTENTS = Intents.default()
+    MEMBER_CACHE = 'default'
+    MEMBER_LRU_SIZE = 1000
+    MAX_GROUPS_PER_OWNER = 5
+    LOG_PATH = ''
+    LOG_LEVEL = 'info'
+    LOG_SAMPLE_RATE = 0.1
+    LOG_SUMMARY_INTERVAL = 3600.0
 
     def read_config_data(self, path: str):
         """
@@ -22,7 +44,61 @@ class BotData:
             raise Exception("config file path does not exist!")
         self.BOT_PREFIX = cfg_parser['data']['prefix']
         self.TOKEN = cfg_parser['data']['token']
+        self.STORE_FLUSH_INTERVAL = cfg_parser['data'].getfloat('store_flush_interval', fallback=self.STORE_FLUSH_INTERVAL)
+        self.STORE_FLUSH_THRESHOLD = cfg_parser['data'].getint('store_flush_threshold', fallback=self.STORE_FLUSH_THRESHOLD)
+        self.STORE_BACKEND = cfg_parser['data'].get('store_backend', fallback=self.STORE_BACKEND).lower()
+        self.STORE_PATH = cfg_parser['data'].get('store_path', fallback=self.STORE_PATH)
+        self.PVC_IDLE_TTL = cfg_parser['data'].getfloat('pvc_idle_ttl', fallback=self.PVC_IDLE_TTL)
+        self.CHANNEL_EDIT_WINDOW = cfg_parser['data'].getfloat('channel_edit_window', fallback=self.CHANNEL_EDIT_WINDOW)
+        self.SNAPSHOT_PATH = cfg_parser['data'].get('snapshot_path', fallback=self.SNAPSHOT_PATH)
+        self.SNAPSHOT_INTERVAL = cfg_parser['data'].getfloat('snapshot_interval', fallback=self.SNAPSHOT_INTERVAL)
+        self.METRICS_HOST = cfg_parser['data'].get('metrics_host', fallback=self.METRICS_HOST)
+        self.METRICS_PORT = cfg_parser['data'].getint('metrics_port', fallback=self.METRICS_PORT)
+        shard_count = cfg_parser['data'].get('shard_count', fallback='0').lower()
+        self.SHARD_COUNT = -1 if shard_count == 'auto' else int(shard_count)
+        self.SHARD_PROCESSES = cfg_parser['data'].getint('shard_processes', fallback=self.SHARD_PROCESSES)
+        self.OUTBOX_PATH = cfg_parser['data'].get('outbox_path', fallback=self.OUTBOX_PATH)
+        self.PROVISION_WORKERS = cfg_parser['data'].getint('provision_workers', fallback=self.PROVISION_WORKERS)
+        self.INTENTS = self.parse_intents(cfg_parser['data'].get('intents', fallback='default'))
+        self.MEMBER_CACHE = cfg_parser['data'].get('member_cache', fallback=self.MEMBER_CACHE).lower()
+        self.MEMBER_LRU_SIZE = cfg_parser['data'].getint('member_lru_size', fallback=self.MEMBER_LRU_SIZE)
+        self.MAX_GROUPS_PER_OWNER = cfg_parser['data'].getint('max_groups_per_owner', fallback=self.MAX_GROUPS_PER_OWNER)
+        self.LOG_PATH = cfg_parser['data'].get('log_path', fallback=self.LOG_PATH)
+        self.LOG_LEVEL = cfg_parser['data'].get('log_level', fallback=self.LOG_LEVEL).lower()
+        self.LOG_SAMPLE_RATE = cfg_parser['data'].getfloat('log_sample_rate', fallback=self.LOG_SAMPLE_RATE)
+        self.LOG_SUMMARY_INTERVAL = cfg_parser['data'].getfloat('log_summary_interval', fallback=self.LOG_SUMMARY_INTERVAL)
+        if self.LOG_LEVEL not in ('debug', 'info', 'warning', 'error'):
+            raise Exception(f"unknown log level `{self.LOG_LEVEL}` (expected `debug`, `info`, `warning` or `error`)!")
+        if self.MEMBER_CACHE not in ('default', 'voice', 'none', 'tracked'):
+            raise Exception(f"unknown member cache policy `{self.MEMBER_CACHE}` (expected `default`, `voice`, `none` or `tracked`)!")
+        if self.MEMBER_CACHE in ('voice', 'tracked') and not self.INTENTS.voice_states:
+            raise Exception(f"the `{self.MEMBER_CACHE}` member cache policy needs the voice_states intent!")
+        if self.PVC_IDLE_TTL > 0 and not self.INTENTS.voice_states:
+            #? Without voice states every group channel looks empty and would be reaped.
+            raise Exception("pvc_idle_ttl needs the voice_states intent!")
+        if self.STORE_BACKEND not in ('json', 'sqlite'):
+            raise Exception(f"unknown store backend `{self.STORE_BACKEND}` (expected `json` or `sqlite`)!")
+        if self.SHARD_PROCESSES > 1 and (self.SHARD_COUNT <= 0 or self.STORE_BACKEND != 'sqlite'):
+            raise Exception("running several shard processes needs a fixed shard_count and the sqlite store backend!")
     
+    @staticmethod
+    def parse_intents(value: str) -> Intents:
+        """
+        @param value: `default`, `all`, or comma separated intent names (e.g. `guilds,guild_messages,voice_states`).
+        @type value: str
+        @return: the gateway intents.
+        """
+        value = value.strip().lower()
+        if value == 'default':
+            return Intents.default()
+        if value == 'all':
+            return Intents.all()
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = [name for name in names if name not in Intents.VALID_FLAGS]
+        if unknown:
+            raise Exception(f"unknown intents {', '.join(unknown)}!")
+        return Intents(**{name: True for name in names})
+
     def read_json(self, path:str):
         """
         Makes sure the json file exists, if it doesn't exist the program will creat it itself.
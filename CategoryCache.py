@@ -0,0 +1,100 @@
+import discord
+
+from LockManager import LockManager
+
+#? Name of the category the private voice channels are created in.
+PVC_CATEGORY_NAME = '🔒private voice channels🔒'
+
+
+class CategoryCache:
+    """
+    Per-guild cache of the private voice channels category's id.
+
+    The cache is kept current by the guild channel events (see `on_channel_*`), so the guild's
+    categories are only scanned on a cache miss. Creating the category runs under a per-guild
+    lock so concurrent commands in a new guild create exactly one category.
+    """
+
+    def __init__(self, name: str = PVC_CATEGORY_NAME):
+        """
+        @param name: name of the private voice channels category.
+        @type name: str
+        """
+        self.name = name
+        self._category_ids = dict()
+        self._locks = LockManager()
+
+    def _cached(self, guild: discord.Guild) -> discord.CategoryChannel:
+        category_id = self._category_ids.get(guild.id, None)
+        if category_id is None:
+            return None
+        category = guild.get_channel(category_id)
+        if category is None:
+            #? Deleted without us seeing the event.
+            del self._category_ids[guild.id]
+        return category
+
+    def _scan(self, guild: discord.Guild) -> discord.CategoryChannel:
+        for category in guild.categories:
+            if category.name == self.name:
+                self._category_ids[guild.id] = category.id
+                return category
+        return None
+
+    def get(self, guild: discord.Guild) -> discord.CategoryChannel:
+        """
+        @param guild: the guild to get the category of.
+        @type guild: discord.Guild
+        @return: the guild's private voice channels category, None if it does not exist.
+        """
+        return self._cached(guild) or self._scan(guild)
+
+    async def get_or_create(self, guild: discord.Guild) -> discord.CategoryChannel:
+        """
+        @param guild: the guild to get the category of.
+        @type guild: discord.Guild
+        @return: the guild's private voice channels category, created if it does not exist.
+        """
+        category = self._cached(guild)
+        if category is not None:
+            return category
+
+        async with self._locks.hold(guild.id):
+            #? Another command might have found or created the category while we were waiting.
+            category = self._cached(guild) or self._scan(guild)
+            if category is None:
+                category = await guild.create_category(self.name)
+                self._category_ids[guild.id] = category.id
+            return category
+
+    def on_channel_create(self, channel):
+        if isinstance(channel, discord.CategoryChannel) and channel.name == self.name:
+            self._category_ids.setdefault(channel.guild.id, channel.id)
+
+    def on_channel_delete(self, channel):
+        if self._category_ids.get(channel.guild.id, None) == channel.id:
+            del self._category_ids[channel.guild.id]
+
+    def on_channel_update(self, before, after):
+        if not isinstance(after, discord.CategoryChannel):
+            return
+        if after.name == self.name:
+            self._category_ids.setdefault(after.guild.id, after.id)
+        elif self._category_ids.get(after.guild.id, None) == after.id:
+            #? The category was renamed, it is not ours anymore.
+            del self._category_ids[after.guild.id]
+
+    def forget_guild(self, guild_id: int):
+        self._category_ids.pop(guild_id, None)
+
+    def dump(self) -> dict:
+        """
+        @return: a copy of the cached `{guild_id: category_id}`.
+        """
+        return dict(self._category_ids)
+
+    def restore(self, category_ids: dict):
+        """
+        Seeds the cache (e.g. from a warm start snapshot), stale entries are dropped on their first lookup.
+        """
+        self._category_ids.update(category_ids)
@@ -0,0 +1,114 @@
+import asyncio
+
+import discord
+
+from EventLog import EVENT_LOG
+
+#? Discord's max voice channel user limit (0 means unlimited).
+MAX_USER_LIMIT = 99
+
+
+class _PendingEdit:
+    def __init__(self, channel: discord.VoiceChannel):
+        self.channel = channel
+        self.role = None
+        self.added_ids = set()
+        self.removed_ids = set()
+
+
+class ChannelEditor:
+    """
+    Coalesces the user limit updates of a voice channel made within `window` seconds into a single `edit` call.
+
+    The user limit is not incremented by every command but computed once, when the edit is sent,
+    from the group's member count (see `_member_count`).
+    """
+
+    def __init__(self, window: float = 1.0, group_members=None):
+        """
+        @param window: seconds the changes of a channel are collected before they are sent.
+        @type window: float
+        @param group_members: returns the ids of a group's members by role id, None while they are not all
+                              known (e.g. `GroupStore.group_members`), optional.
+        @type group_members: Callable[[int], set]
+        """
+        self.window = window
+        self.group_members = group_members
+        self._pending = dict()  #? channel id -> _PendingEdit.
+
+    def _get_pending(self, channel: discord.VoiceChannel) -> _PendingEdit:
+        pending = self._pending.get(channel.id, None)
+        if pending is None:
+            pending = self._pending[channel.id] = _PendingEdit(channel)
+            asyncio.ensure_future(self._flush_later(pending))
+        pending.channel = channel
+        return pending
+
+    def update_members(self, channel: discord.VoiceChannel, role: discord.Role, added_ids=(), removed_ids=()):
+        """
+        Queues a user limit update after members were added to / removed from the group's role.
+
+        @param added_ids: ids of the members the role was just added to.
+        @param removed_ids: ids of the members the role was just removed from.
+        """
+        pending = self._get_pending(channel)
+        pending.role = role
+        pending.added_ids = (pending.added_ids - set(removed_ids)) | set(added_ids)
+        pending.removed_ids = (pending.removed_ids - set(added_ids)) | set(removed_ids)
+
+    def forget(self, channel_id: int):
+        """
+        Drops the pending changes of a deleted channel.
+        """
+        self._pending.pop(channel_id, None)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def _member_count(self, pending: _PendingEdit) -> int:
+        """
+        The group's members once all of them are known, or with the whole member list cached, the role's cached members,
+        plus / minus the changes whose member update event has not arrived yet. Otherwise the channel's
+        current limit plus / minus the changes, read once when the edit is sent.
+        """
+        role = pending.role
+        member_ids = self.group_members(role.id) if self.group_members is not None else None
+        if member_ids is not None:
+            return len((member_ids | pending.added_ids) - pending.removed_ids)
+        if role.guild.chunked:
+            member_ids = {member.id for member in role.members}
+            return len((member_ids | pending.added_ids) - pending.removed_ids)
+        return pending.channel.user_limit + len(pending.added_ids) - len(pending.removed_ids)
+
+    async def _flush_later(self, pending: _PendingEdit):
+        await asyncio.sleep(self.window)
+        if self._pending.get(pending.channel.id, None) is pending:
+            await self.flush(pending.channel.id)
+
+    async def flush(self, channel_id: int):
+        """
+        Sends the channel's pending changes now, in a single edit (skipped if nothing changes).
+        """
+        pending = self._pending.pop(channel_id, None)
+        if pending is None:
+            return
+        channel = pending.channel
+        if channel.guild.get_channel(channel_id) is None:
+            #? The channel was deleted in the meantime.
+            return
+        user_limit = max(1, min(MAX_USER_LIMIT, self._member_count(pending)))
+        if user_limit == channel.user_limit:
+            return
+        try:
+            await channel.edit(user_limit=user_limit)
+        except discord.NotFound:
+            #? The channel was deleted in the meantime.
+            pass
+        except discord.HTTPException as e:
+            EVENT_LOG.error('channel_edit_failed', e, guild=channel.guild.id, channel=channel_id)
+
+    async def flush_all(self):
+        """
+        Sends every pending change now (e.g. on shutdown).
+        """
+        await asyncio.gather(*[self.flush(channel_id) for channel_id in list(self._pending)])
@@ -0,0 +1,181 @@
+import contextvars
+import datetime
+import json
+import queue
+import random
+import sys
+import threading
+import time
+
+#? Fields of the command currently running (guild, owner, command), added to every record logged from it.
+LOG_CONTEXT = contextvars.ContextVar('LOG_CONTEXT', default=None)
+
+#? Log levels, a record is written only if its level is at least the configured one.
+LOG_LEVELS = {'debug': 10, 'info': 20, 'warning': 30, 'error': 40}
+
+
+class EventLog:
+    """
+    Structured logging that never blocks the event loop.
+
+    Logging a record only builds a small dict and puts it in a bounded queue (the record is dropped
+    and counted if the queue is full), a background thread encodes the records as JSON lines and
+    writes them in batches to stdout or to a file. High-volume events can be sampled (see `sample`)
+    and repeated errors are rate limited: at most `error_burst` records of the same error per
+    `error_window` seconds, the next one written carries the amount of suppressed ones.
+    """
+
+    def __init__(self, level: str = 'info', sample_rate: float = 1.0, error_burst: int = 5, error_window: float = 60.0, queue_size: int = 10000):
+        """
+        @param level: one of `LOG_LEVELS`.
+        @type level: str
+        @param sample_rate: share (0 to 1) of the sampled events that are written.
+        @type sample_rate: float
+        @param error_burst: max amount of records of the same error per `error_window` seconds.
+        @type error_burst: int
+        @param error_window: seconds of the error rate limit window.
+        @type error_window: float
+        @param queue_size: max amount of records waiting to be written.
+        @type queue_size: int
+        """
+        self.level = LOG_LEVELS[level]
+        self.sample_rate = sample_rate
+        self.error_burst = error_burst
+        self.error_window = error_window
+        self.path = None
+        self.dropped = 0  #? Records lost because the queue was full.
+        self.suppressed = 0  #? Error records dropped by the rate limit.
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._errors = dict()  #? (event, error type, error text) -> [window start, count in window, suppressed].
+        self._thread = None
+
+    def configure(self, path: str = None, level: str = 'info', sample_rate: float = 1.0):
+        """
+        @param path: file the records are appended to, None (or empty) writes them to stdout.
+        """
+        self.path = path or None
+        self.level = LOG_LEVELS[level]
+        self.sample_rate = sample_rate
+
+    def start(self):
+        """
+        Starts the writer thread, the records logged so far are written first.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._write_loop, name='event-log', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """
+        Writes the pending records and stops the writer thread.
+        """
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+        self._thread = None
+
+    def log(self, level: str, event: str, **fields):
+        """
+        Queues a record, never blocks.
+
+        @param level: one of `LOG_LEVELS`.
+        @param event: short snake case name of what happened (e.g. `command`).
+        @param fields: the record's fields, on top of the current command's context.
+        """
+        if LOG_LEVELS[level] < self.level:
+            return
+        context = LOG_CONTEXT.get()
+        record = {'ts': time.time(), 'level': level, 'event': event}
+        if context is not None:
+            record.update(context)
+        record.update(fields)
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def debug(self, event: str, **fields):
+        self.log('debug', event, **fields)
+
+    def info(self, event: str, **fields):
+        self.log('info', event, **fields)
+
+    def warning(self, event: str, **fields):
+        self.log('warning', event, **fields)
+
+    def error(self, event: str, error: BaseException = None, **fields):
+        """
+        Queues an error record, unless the same error was already logged `error_burst` times in the current window.
+
+        @param error: the exception, if any.
+        """
+        if error is not None:
+            fields['error'] = str(error)
+            fields['error_type'] = type(error).__name__
+        key = (event, fields.get('error_type', None), fields.get('error', None))
+        now = time.monotonic()
+        window = self._errors.get(key, None)
+        if window is None or now - window[0] >= self.error_window:
+            suppressed = window[2] if window is not None else 0
+            window = self._errors[key] = [now, 0, 0]
+            if suppressed:
+                fields['suppressed'] = suppressed
+            if len(self._errors) > 1000:
+                #? Forget the windows that are over.
+                self._errors = {key: value for key, value in self._errors.items() if now - value[0] < self.error_window}
+                self._errors[key] = window
+        window[1] += 1
+        if window[1] > self.error_burst:
+            window[2] += 1
+            self.suppressed += 1
+            return
+        self.log('error', event, **fields)
+
+    def sample(self, event: str, rate: float = None, **fields):
+        """
+        Queues an info record of a high-volume event with a probability of `rate` (`sample_rate` by default).
+        """
+        rate = self.sample_rate if rate is None else rate
+        if rate < 1.0 and random.random() >= rate:
+            return
+        self.log('info', event, sample_rate=rate, **fields)
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    @staticmethod
+    def _encode(record: dict) -> str:
+        record['ts'] = datetime.datetime.utcfromtimestamp(record['ts']).isoformat(timespec='milliseconds') + 'Z'
+        return json.dumps(record, default=str, ensure_ascii=False)
+
+    def _write_loop(self):
+        stream = open(self.path, 'a', encoding='utf-8') if self.path is not None else sys.stdout
+        try:
+            running = True
+            while running:
+                batch = [self._queue.get()]
+                #? Write whatever else piled up in the meantime along with it.
+                while len(batch) < 500:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if None in batch:
+                    running = False
+                    batch = batch[:batch.index(None)]
+                try:
+                    stream.write(''.join([self._encode(record) + '\n' for record in batch]))
+                    stream.flush()
+                except (OSError, ValueError):
+                    self.dropped += len(batch)
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+
+
+#? The bot's event log, configured and started by `Bot.py`.
+EVENT_LOG = EventLog()
@@ -0,0 +1,40 @@
+import asyncio
+
+import discord
+
+
+async def delete_quietly(obj):
+    """
+    Deletes a role or a channel, ignoring it if it is already gone.
+    """
+    try:
+        await obj.delete()
+    except discord.NotFound:
+        pass
+
+
+async def purge_group(store, guild: discord.Guild, role_id: int, delete=delete_quietly) -> bool:
+    """
+    Deletes a private group: its role, its voice channel and its store entry.
+    Whatever is left of a half deleted group is deleted as well.
+
+    @param store: the group store.
+    @type store: GroupStore or SqliteGroupStore
+    @param guild: the guild the group lives in.
+    @type guild: discord.Guild
+    @param role_id: id of the group's role.
+    @type role_id: int
+    @param delete: coroutine function deleting a role or a channel (e.g. through a rate limited executor).
+    @type delete: Callable[[object], Awaitable]
+    @return: True if the group existed and was complete (both role and voice channel), False otherwise.
+    """
+    group = store.get_group(role_id)
+    if group is None:
+        return False
+
+    role = guild.get_role(int(role_id))
+    vc = guild.get_channel(int(group[2]))
+    #? Remove the entry first, so the role / channel delete events find nothing to reconcile.
+    store.delete(role_id)
+    await asyncio.gather(*[delete(obj) for obj in (role, vc) if obj is not None])
+    return role is not None and vc is not None
@@ -0,0 +1,179 @@
+import asyncio
+import datetime
+import time
+from collections import namedtuple
+
+import discord
+
+from GroupActions import delete_quietly, purge_group
+from MemberResolver import resolve_member_ids
+
+#? Filters of the bulk purge: idle groups, broken groups (role or channel missing), groups whose owner left and every group.
+GROUP_FILTERS = ('idle', 'orphaned', 'left', 'all')
+
+#? Groups per page of the group list.
+GROUPS_PER_PAGE = 10
+
+#? A group as shown to the admins. `role` / `vc` are None when missing, `owner_present` is None when not checked,
+#? `activity_known` is False when no voice activity of the channel was seen since the bot started.
+GroupInfo = namedtuple('GroupInfo', ['owner_id', 'role_id', 'vc_id', 'role', 'vc', 'member_count', 'last_active', 'owner_present', 'activity_known'])
+
+
+class ActivityLog:
+    """
+    Unix time of the last voice activity (someone joining or leaving) of every voice channel.
+
+    The activity is kept in the warm start snapshot. The channels without any seen activity
+    (e.g. when there was no snapshot) count as active when the bot started, so a restart never
+    makes a group look idle.
+    """
+
+    def __init__(self):
+        self._last_active = dict()
+        self.started = time.time()
+
+    def dump(self) -> dict:
+        """
+        @return: a copy of the `{channel_id: unix time}` activity, as taken by `restore`.
+        """
+        return dict(self._last_active)
+
+    def restore(self, last_active: dict):
+        """
+        Adds the activity of the previous run (from a warm start snapshot), newer activity wins.
+        """
+        for channel_id, when in last_active.items():
+            self._last_active[channel_id] = max(when, self._last_active.get(channel_id, 0.0))
+
+    def touch(self, channel_id: int, when: float = None):
+        self._last_active[channel_id] = when or time.time()
+
+    def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
+        if before.channel == after.channel:
+            return
+        for channel in (before.channel, after.channel):
+            if channel is not None:
+                self.touch(channel.id)
+
+    def forget(self, channel_id: int):
+        self._last_active.pop(channel_id, None)
+
+    def _created_at(self, vc) -> float:
+        #? `created_at` is a naive utc datetime.
+        return vc.created_at.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+    def is_known(self, vc) -> bool:
+        """
+        @return: whether the channel's activity was seen (or it was created after the bot started).
+        """
+        return vc.id in self._last_active or self._created_at(vc) >= self.started
+
+    def last_active(self, vc) -> float:
+        """
+        @return: now if someone is in the channel, else its last seen activity (its creation, or the bot's
+                 start if it was created before, when none was seen).
+        """
+        #? `voice_states` does not depend on the member cache, unlike `members`.
+        if vc.voice_states:
+            return time.time()
+        last_active = self._last_active.get(vc.id, None)
+        if last_active is None:
+            last_active = max(self._created_at(vc), self.started)
+        return last_active
+
+
+async def collect_groups(store, guild: discord.Guild, activity: ActivityLog, check_owners: bool = False) -> list:
+    """
+    @param store: the group store.
+    @param guild: the guild to list the groups of.
+    @type guild: discord.Guild
+    @param activity: the voice channels' activity.
+    @type activity: ActivityLog
+    @param check_owners: whether to check that the owners are still in the guild (may cost gateway / REST requests).
+    @type check_owners: bool
+    @return: a `GroupInfo` per group of the guild, least recently active first.
+    """
+    groups = store.guild_groups(guild.id)
+    present = None
+    if check_owners:
+        present = await resolve_member_ids(guild, [owner_id for owner_id, role_id, vc_id in groups])
+
+    infos = list()
+    for owner_id, role_id, vc_id in groups:
+        role, vc = guild.get_role(role_id), guild.get_channel(vc_id)
+        member_ids = store.group_members(role_id)
+        infos.append(GroupInfo(
+            owner_id, role_id, vc_id, role, vc,
+            len(member_ids) if member_ids is not None else (len(role.members) if role is not None else 0),
+            activity.last_active(vc) if vc is not None else 0.0,
+            None if present is None else owner_id in present,
+            activity.is_known(vc) if vc is not None else True,
+        ))
+    infos.sort(key=lambda info: (info.last_active, info.owner_id))
+    return infos
+
+
+def match_group(info: GroupInfo, group_filter: str, idle_seconds: float, now: float) -> bool:
+    """
+    @param group_filter: one of `GROUP_FILTERS`.
+    @param idle_seconds: seconds a group's channel must have been inactive for it to be idle.
+    @return: whether the group matches the filter.
+    """
+    if group_filter == 'all':
+        return True
+    if group_filter == 'orphaned':
+        return info.role is None or info.vc is None
+    if group_filter == 'left':
+        return info.owner_present is False
+    return info.vc is not None and now - info.last_active >= idle_seconds
+
+
+async def bulk_purge(store, group_locks, executor, guild: discord.Guild, infos: list, progress=None, progress_interval: float = 2.0) -> tuple:
+    """
+    Purges many groups of a guild at once. The deletions of every group go through the executor's guild
+    bucket, so they run as fast as the rate limit allows and rate limited deletions are retried.
+
+    @param store: the group store.
+    @param group_locks: the `(guild_id, owner_id)` group locks the commands hold.
+    @type group_locks: LockManager
+    @param executor: runs the deletions within the guild's rate limit.
+    @type executor: RoleExecutor
+    @param guild: the guild the groups live in.
+    @type guild: discord.Guild
+    @param infos: the groups to purge.
+    @type infos: list[GroupInfo]
+    @param progress: coroutine function `(done, total)`, called at most every `progress_interval` seconds.
+    @return: the amount of purged groups and the amount of roles / channels that could not be deleted.
+    """
+    total, done, failed = len(infos), 0, 0
+    last_report = time.monotonic()
+
+    async def delete(obj):
+        nonlocal failed
+        results = await executor.run(guild, [obj], delete_quietly)
+        failed += len([result for result in results if result.error is not None])
+
+    async def purge_one(info: GroupInfo):
+        nonlocal done, last_report
+        async with group_locks.hold((guild.id, info.owner_id)):
+            await purge_group(store, guild, info.role_id, delete)
+        done += 1
+        if progress is not None and time.monotonic() - last_report >= progress_interval:
+            last_report = time.monotonic()
+            try:
+                await progress(done, total)
+            except discord.HTTPException:
+                pass
+
+    await asyncio.gather(*[purge_one(info) for info in infos])
+    return done, failed
+
+
+def format_age(seconds: float) -> str:
+    """
+    @return: a short human readable duration (e.g. `3h`).
+    """
+    for unit, size in (('d', 86400), ('h', 3600), ('m', 60)):
+        if seconds >= size:
+            return f"{int(seconds // size)}{unit}"
+    return "now"
@@ -0,0 +1,628 @@
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import time
+
+from EventLog import EVENT_LOG
+
+#? Version of the json database layout, files without it hold the old flat `{owner_id: [role_id, vc_id]}` dict.
+#? Version 2 held a single `[role_id, vc_id]` group per `{guild_id: {owner_id: ...}}`.
+JSON_VERSION = 3
+
+
+def read_json_groups(path: str):
+    """
+    Reads a json database file of any version.
+
+    @param path: path to the json database file.
+    @type path: str
+    @return: a `{role_id: (guild_id, owner_id, vc_id)}` dict, a `{role_id: set(member_ids)}` dict, a
+             `{owner_id: (role_id, vc_id)}` dict of the legacy entries whose guild is not known yet and the
+             set of role ids whose members are not all known (groups from older databases).
+    """
+    try:
+        with open(path, 'r') as f:
+            data = json.loads(f.read())
+    except (OSError, ValueError):
+        data = dict()
+    if not isinstance(data, dict):
+        data = dict()
+
+    if 'version' not in data:
+        #? Old flat layout, every entry is a legacy entry.
+        return dict(), dict(), {int(owner_id): (int(group[0]), int(group[1])) for owner_id, group in data.items()}, set()
+
+    groups, members, unknown = dict(), dict(), set()
+    for guild_id, owners in data.get('groups', {}).items():
+        for owner_id, owner_groups in owners.items():
+            if data['version'] < 3:
+                #? A single `[role_id, vc_id]` group per owner, the owner is its only known member.
+                owner_groups = {owner_groups[0]: (owner_groups[1], [owner_id], False)}
+            for role_id, group in owner_groups.items():
+                groups[int(role_id)] = (int(guild_id), int(owner_id), int(group[0]))
+                members[int(role_id)] = {int(member_id) for member_id in group[1]}
+                #? Groups written without the flag may have been migrated, so their members are not trusted.
+                if len(group) < 3 or not group[2]:
+                    unknown.add(int(role_id))
+    legacy = {int(owner_id): (int(group[0]), int(group[1])) for owner_id, group in data.get('legacy', {}).items()}
+    return groups, members, legacy, unknown
+
+
+class GroupStore:
+    """
+    In-memory store of every private group, backed by the json database file.
+
+    Groups are keyed by their role id (an owner may have several groups) and hold the group's
+    guild, owner and voice channel, along with the ids of the group's members. Reverse indexes
+    map channels, guilds, owners and members back to their groups, so "which groups is this
+    member in" is a single dict lookup. Groups migrated from older databases only know some of
+    their members (their owner) until `set_members` backfills them, see `group_members`.
+    The file is read once on `load` and every lookup is served from memory.
+    Changes only mark the store as dirty, a background task writes them back to disk
+    (off the event loop) every `flush_interval` seconds or as soon as `flush_threshold`
+    changes have piled up.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 5.0, flush_threshold: int = 50):
+        """
+        @param path: path to the json database file.
+        @type path: str
+        @param flush_interval: max seconds between a change and its flush to disk.
+        @type flush_interval: float
+        @param flush_threshold: amount of unflushed changes that triggers an early flush.
+        @type flush_threshold: int
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self._groups = dict()
+        self._members = dict()  #? role id -> frozenset of member ids, replaced on change so a snapshot can share them.
+        self._unknown = set()  #? Role ids of the groups whose members are not all known.
+        self._legacy = dict()
+        self._by_channel = dict()
+        self._by_guild = dict()
+        self._by_owner = dict()
+        self._by_member = dict()
+        self._dirty = 0
+        self._flush_event = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        #? Optional callback receiving the duration (seconds) of every flush.
+        self.on_flush = None
+
+    def load(self):
+        """
+        Reads the whole json database into memory, an invalid file is treated as empty.
+        """
+        self.restore(*read_json_groups(self.path))
+
+    def restore(self, groups: dict, members: dict, legacy: dict, unknown=()):
+        """
+        Replaces the store's content with the given groups (e.g. from a warm start snapshot), nothing is written.
+
+        @param groups: `{role_id: (guild_id, owner_id, vc_id)}`.
+        @param members: `{role_id: set(member_ids)}`.
+        @param legacy: `{owner_id: (role_id, vc_id)}` of the legacy entries.
+        @param unknown: role ids of the groups whose members are not all known.
+        """
+        self._groups, self._legacy = dict(), dict(legacy)
+        self._unknown = {int(role_id) for role_id in unknown if int(role_id) in groups}
+        self._members, self._by_channel, self._by_guild, self._by_owner, self._by_member = dict(), dict(), dict(), dict(), dict()
+        for role_id, (guild_id, owner_id, vc_id) in groups.items():
+            self._index(role_id, guild_id, owner_id, vc_id, members.get(role_id, ()))
+        self._dirty = 0
+
+    def _index(self, role_id: int, guild_id: int, owner_id: int, vc_id: int, member_ids):
+        self._groups[role_id] = (guild_id, owner_id, vc_id)
+        self._members[role_id] = frozenset()
+        self._by_channel[vc_id] = role_id
+        self._by_guild.setdefault(guild_id, set()).add(role_id)
+        self._by_owner.setdefault((guild_id, owner_id), set()).add(role_id)
+        self._add_members(role_id, guild_id, member_ids)
+
+    def _add_members(self, role_id: int, guild_id: int, member_ids):
+        member_ids = {int(member_id) for member_id in member_ids}
+        self._members[role_id] = self._members[role_id] | member_ids
+        for member_id in member_ids:
+            self._by_member.setdefault((guild_id, member_id), set()).add(role_id)
+
+    def _remove_members(self, role_id: int, guild_id: int, member_ids):
+        member_ids = {int(member_id) for member_id in member_ids}
+        self._members[role_id] = self._members[role_id] - member_ids
+        for member_id in member_ids:
+            groups = self._by_member.get((guild_id, member_id), None)
+            if groups is not None:
+                groups.discard(role_id)
+                if not groups:
+                    del self._by_member[(guild_id, member_id)]
+
+    def get_group(self, role_id) -> tuple:
+        """
+        @param role_id: id of the group's role.
+        @return: the `(guild_id, owner_id, vc_id)` tuple of the group, None if there is no such group.
+        """
+        return self._groups.get(int(role_id), None)
+
+    def owner_groups(self, guild_id, owner_id) -> list:
+        """
+        @return: the `(role_id, vc_id)` tuples of the owner's groups in the guild, oldest first.
+        """
+        return [(role_id, self._groups[role_id][2]) for role_id in sorted(self._by_owner.get((int(guild_id), int(owner_id)), ()))]
+
+    def set(self, guild_id, owner_id, role_id, vc_id, member_ids=(), members_known: bool = True):
+        """
+        Stores (or replaces) a group.
+
+        @param member_ids: ids of the group's members.
+        @param members_known: whether `member_ids` are all of the group's members.
+        """
+        role_id = int(role_id)
+        self._unindex(role_id)
+        self._index(role_id, int(guild_id), int(owner_id), int(vc_id), member_ids)
+        if not members_known:
+            self._unknown.add(role_id)
+        self._mark_dirty()
+
+    def delete(self, role_id):
+        """
+        Removes a group, nothing happens if there is no such group.
+        """
+        if self._unindex(int(role_id)):
+            self._mark_dirty()
+
+    def group_by_channel(self, channel_id) -> int:
+        """
+        @return: the role id of the group using the voice channel, None if there is none.
+        """
+        return self._by_channel.get(int(channel_id), None)
+
+    def guild_groups(self, guild_id) -> list:
+        """
+        @return: the `(owner_id, role_id, vc_id)` tuples of every group in the guild.
+        """
+        return [(self._groups[role_id][1], role_id, self._groups[role_id][2]) for role_id in self._by_guild.get(int(guild_id), ())]
+
+    def delete_guild(self, guild_id):
+        """
+        Removes every group of the guild.
+        """
+        for role_id in list(self._by_guild.get(int(guild_id), ())):
+            self.delete(role_id)
+
+    def add_members(self, role_id, member_ids):
+        """
+        Records members as part of a group, nothing happens if there is no such group.
+        """
+        group = self._groups.get(int(role_id), None)
+        if group is not None:
+            self._add_members(int(role_id), group[0], member_ids)
+            self._mark_dirty()
+
+    def remove_members(self, role_id, member_ids):
+        group = self._groups.get(int(role_id), None)
+        if group is not None:
+            self._remove_members(int(role_id), group[0], member_ids)
+            self._mark_dirty()
+
+    def set_members(self, role_id, member_ids):
+        """
+        Replaces the group's members with all of its members (e.g. its role's holders), which marks them as known.
+        """
+        group = self._groups.get(int(role_id), None)
+        if group is not None:
+            self._remove_members(int(role_id), group[0], list(self._members[int(role_id)]))
+            self._add_members(int(role_id), group[0], member_ids)
+            self._unknown.discard(int(role_id))
+            self._mark_dirty()
+
+    def group_members(self, role_id) -> set:
+        """
+        @return: the ids of the group's members (a copy), None if they are not all known (or there is no such group).
+        """
+        if int(role_id) in self._unknown or int(role_id) not in self._members:
+            return None
+        return set(self._members[int(role_id)])
+
+    def is_member(self, role_id, member_id) -> bool:
+        return int(member_id) in self._members.get(int(role_id), ())
+
+    def member_groups(self, guild_id, member_id) -> list:
+        """
+        @return: the role ids of the guild's groups the member is part of.
+        """
+        return sorted(self._by_member.get((int(guild_id), int(member_id)), ()))
+
+    def has_legacy(self) -> bool:
+        return len(self._legacy) > 0
+
+    def adopt_legacy(self, role_guilds: dict, drop_unknown: bool = True) -> int:
+        """
+        Moves the legacy entries (stored without a guild) to the guild their role lives in.
+        Entries whose role is not found anymore are dropped.
+
+        @param role_guilds: `{role_id: guild_id}` of every role the bot can see.
+        @type role_guilds: dict
+        @param drop_unknown: whether to drop the entries whose role was not found.
+        @type drop_unknown: bool
+        @return: amount of adopted entries.
+        """
+        adopted = 0
+        unknown = dict()
+        for owner_id, (role_id, vc_id) in self._legacy.items():
+            guild_id = role_guilds.get(role_id, None)
+            if guild_id is not None:
+                self.set(guild_id, owner_id, role_id, vc_id, [owner_id], members_known=False)
+                adopted += 1
+            else:
+                unknown[owner_id] = (role_id, vc_id)
+        self._legacy = dict() if drop_unknown else unknown
+        self._mark_dirty()
+        return adopted
+
+    def __len__(self):
+        return len(self._groups)
+
+    def _unindex(self, role_id: int) -> bool:
+        group = self._groups.pop(role_id, None)
+        if group is None:
+            return False
+        guild_id, owner_id, vc_id = group
+        self._remove_members(role_id, guild_id, list(self._members[role_id]))
+        del self._members[role_id]
+        self._unknown.discard(role_id)
+        self._by_channel.pop(vc_id, None)
+        for index, key in ((self._by_guild, guild_id), (self._by_owner, (guild_id, owner_id))):
+            roles = index.get(key, None)
+            if roles is not None:
+                roles.discard(role_id)
+                if not roles:
+                    del index[key]
+        return True
+
+    def _mark_dirty(self):
+        self._dirty += 1
+        if self._dirty >= self.flush_threshold:
+            self._flush_event.set()
+
+    def _snapshot(self) -> tuple:
+        return (
+            #? The member sets are never mutated, copying the dict is enough.
+            dict(self._groups), dict(self._members), dict(self._legacy), set(self._unknown),
+        )
+
+    def is_flushed(self) -> bool:
+        """
+        @return: whether the json database holds every change.
+        """
+        return self._dirty == 0
+
+    def dump(self) -> tuple:
+        """
+        @return: a copy of the `(groups, members, legacy, unknown)`, as taken by `restore`.
+        """
+        return self._snapshot()
+
+    @staticmethod
+    def _write_atomic(path: str, snapshot: tuple):
+        """
+        Dumps the groups into a temp file next to `path` and renames it over `path`,
+        so a crash mid-write never leaves a truncated database behind.
+        """
+        groups, members, legacy, unknown = snapshot
+        by_guild = dict()
+        for role_id, (guild_id, owner_id, vc_id) in groups.items():
+            owners = by_guild.setdefault(str(guild_id), dict())
+            owners.setdefault(str(owner_id), dict())[str(role_id)] = (
+                str(vc_id), [str(member_id) for member_id in members.get(role_id, ())], role_id not in unknown,
+            )
+        data = json.dumps({
+            'version': JSON_VERSION,
+            'groups': by_guild,
+            'legacy': {str(owner_id): (str(role_id), str(vc_id)) for owner_id, (role_id, vc_id) in legacy.items()},
+        })
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.groups-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    async def flush(self):
+        """
+        Writes the pending changes to disk on a worker thread.
+        """
+        async with self._flush_lock:
+            if self._dirty == 0:
+                return
+            #? Snapshot the groups so the event loop can keep changing them during the write.
+            snapshot, dirty = self._snapshot(), self._dirty
+            self._dirty = 0
+            started = time.perf_counter()
+            try:
+                await asyncio.get_event_loop().run_in_executor(None, self._write_atomic, self.path, snapshot)
+            except Exception:
+                self._dirty += dirty
+                raise
+            if self.on_flush is not None:
+                self.on_flush(time.perf_counter() - started)
+
+    def flush_sync(self):
+        """
+        Blocking flush, used once the event loop is gone (on shutdown).
+        """
+        if self._dirty == 0:
+            return
+        self._write_atomic(self.path, self._snapshot())
+        self._dirty = 0
+
+    def close(self):
+        """
+        Flushes the store, it holds no open file.
+        """
+        self.flush_sync()
+
+    async def flush_loop(self):
+        """
+        Flushes the store every `flush_interval` seconds, or earlier when enough changes are pending.
+        """
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_event.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_event.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                EVENT_LOG.error('store_flush_failed', e)
+
+
+class SqliteGroupStore:
+    """
+    SQLite backed group store, same interface as `GroupStore`.
+
+    Groups have a primary key on their role id and indexes on the channel id and on
+    `(guild_id, owner_id)`, group members have an index on `(guild_id, member_id)`, so the
+    reverse lookups are O(log n) without holding every group in memory.
+    Every change is committed right away (WAL journal), so there is nothing to flush.
+    """
+
+    def __init__(self, path: str, json_path: str = None):
+        """
+        @param path: path to the sqlite database file.
+        @type path: str
+        @param json_path: json database to migrate from the first time the database is created (optional).
+        @type json_path: str
+        """
+        self.path = path
+        self.json_path = json_path
+        self._db = None
+
+    def load(self):
+        """
+        Opens (and creates if needed) the database, migrating the json database into it once.
+        """
+        self._db = sqlite3.connect(self.path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS private_groups (
+                role_id INTEGER PRIMARY KEY,
+                guild_id INTEGER NOT NULL,
+                owner_id INTEGER NOT NULL,
+                channel_id INTEGER NOT NULL,
+                members_known INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS private_groups_owner ON private_groups (guild_id, owner_id);
+            CREATE INDEX IF NOT EXISTS private_groups_channel_id ON private_groups (channel_id);
+            CREATE TABLE IF NOT EXISTS group_members (
+                role_id INTEGER NOT NULL,
+                guild_id INTEGER NOT NULL,
+                member_id INTEGER NOT NULL,
+                PRIMARY KEY (role_id, member_id)
+            );
+            CREATE INDEX IF NOT EXISTS group_members_member ON group_members (guild_id, member_id);
+            CREATE TABLE IF NOT EXISTS legacy_groups (
+                owner_id INTEGER PRIMARY KEY,
+                role_id INTEGER NOT NULL,
+                channel_id INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        """)
+        if 'members_known' not in [row[1] for row in self._db.execute("PRAGMA table_info(private_groups)")]:
+            #? Groups stored before the flag existed may have been migrated, so their members are not trusted.
+            self._db.execute("ALTER TABLE private_groups ADD COLUMN members_known INTEGER NOT NULL DEFAULT 0")
+        if self._db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'groups'").fetchone() is not None:
+            self._migrate_single_groups()
+        if self.json_path is not None and self._get_meta('json_migrated') is None:
+            self._migrate_json()
+
+    def _get_meta(self, key: str) -> str:
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None else None
+
+    def _migrate_single_groups(self):
+        """
+        One-time move of the old one group per owner `groups` table, the owners become their groups' first members.
+        """
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.execute(
+                "INSERT OR REPLACE INTO private_groups SELECT role_id, guild_id, owner_id, channel_id, 0 FROM groups"
+            )
+            self._db.execute("INSERT OR IGNORE INTO group_members SELECT role_id, guild_id, owner_id FROM groups")
+            self._db.execute("DROP TABLE groups")
+
+    def _migrate_json(self):
+        """
+        One-time copy of the json database into sqlite. Legacy entries are kept in `legacy_groups`
+        until `adopt_legacy` can tell which guild they belong to.
+        """
+        groups, members, legacy, unknown = read_json_groups(self.json_path) if os.path.exists(self.json_path) else (dict(), dict(), dict(), set())
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT OR REPLACE INTO private_groups VALUES (?, ?, ?, ?, ?)",
+                [(role_id, guild_id, owner_id, vc_id, int(role_id not in unknown)) for role_id, (guild_id, owner_id, vc_id) in groups.items()],
+            )
+            self._db.executemany(
+                "INSERT OR IGNORE INTO group_members VALUES (?, ?, ?)",
+                [(role_id, groups[role_id][0], member_id) for role_id, member_ids in members.items() for member_id in member_ids],
+            )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO legacy_groups VALUES (?, ?, ?)",
+                [(owner_id, role_id, vc_id) for owner_id, (role_id, vc_id) in legacy.items()],
+            )
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('json_migrated', '1')")
+
+    def get_group(self, role_id) -> tuple:
+        row = self._db.execute(
+            "SELECT guild_id, owner_id, channel_id FROM private_groups WHERE role_id = ?", (int(role_id),)
+        ).fetchone()
+        return tuple(row) if row is not None else None
+
+    def owner_groups(self, guild_id, owner_id) -> list:
+        return [
+            tuple(row) for row in self._db.execute(
+                "SELECT role_id, channel_id FROM private_groups WHERE guild_id = ? AND owner_id = ? ORDER BY role_id",
+                (int(guild_id), int(owner_id)),
+            )
+        ]
+
+    def set(self, guild_id, owner_id, role_id, vc_id, member_ids=(), members_known: bool = True):
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.execute("DELETE FROM group_members WHERE role_id = ?", (int(role_id),))
+            self._db.execute(
+                "INSERT OR REPLACE INTO private_groups VALUES (?, ?, ?, ?, ?)",
+                (int(role_id), int(guild_id), int(owner_id), int(vc_id), int(members_known)),
+            )
+            self._db.executemany(
+                "INSERT OR IGNORE INTO group_members VALUES (?, ?, ?)",
+                [(int(role_id), int(guild_id), int(member_id)) for member_id in member_ids],
+            )
+
+    def delete(self, role_id):
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.execute("DELETE FROM private_groups WHERE role_id = ?", (int(role_id),))
+            self._db.execute("DELETE FROM group_members WHERE role_id = ?", (int(role_id),))
+
+    def group_by_channel(self, channel_id) -> int:
+        row = self._db.execute("SELECT role_id FROM private_groups WHERE channel_id = ?", (int(channel_id),)).fetchone()
+        return row[0] if row is not None else None
+
+    def guild_groups(self, guild_id) -> list:
+        return [
+            tuple(row) for row in self._db.execute(
+                "SELECT owner_id, role_id, channel_id FROM private_groups WHERE guild_id = ?", (int(guild_id),)
+            )
+        ]
+
+    def delete_guild(self, guild_id):
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.execute("DELETE FROM private_groups WHERE guild_id = ?", (int(guild_id),))
+            self._db.execute("DELETE FROM group_members WHERE guild_id = ?", (int(guild_id),))
+
+    def add_members(self, role_id, member_ids):
+        group = self.get_group(role_id)
+        if group is not None:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO group_members VALUES (?, ?, ?)",
+                [(int(role_id), group[0], int(member_id)) for member_id in member_ids],
+            )
+
+    def remove_members(self, role_id, member_ids):
+        self._db.executemany(
+            "DELETE FROM group_members WHERE role_id = ? AND member_id = ?", [(int(role_id), int(member_id)) for member_id in member_ids]
+        )
+
+    def set_members(self, role_id, member_ids):
+        group = self.get_group(role_id)
+        if group is None:
+            return
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.execute("DELETE FROM group_members WHERE role_id = ?", (int(role_id),))
+            self._db.executemany(
+                "INSERT OR IGNORE INTO group_members VALUES (?, ?, ?)",
+                [(int(role_id), group[0], int(member_id)) for member_id in member_ids],
+            )
+            self._db.execute("UPDATE private_groups SET members_known = 1 WHERE role_id = ?", (int(role_id),))
+
+    def group_members(self, role_id) -> set:
+        row = self._db.execute("SELECT members_known FROM private_groups WHERE role_id = ?", (int(role_id),)).fetchone()
+        if row is None or not row[0]:
+            return None
+        return {row[0] for row in self._db.execute("SELECT member_id FROM group_members WHERE role_id = ?", (int(role_id),))}
+
+    def is_member(self, role_id, member_id) -> bool:
+        return self._db.execute(
+            "SELECT 1 FROM group_members WHERE role_id = ? AND member_id = ?", (int(role_id), int(member_id))
+        ).fetchone() is not None
+
+    def member_groups(self, guild_id, member_id) -> list:
+        return [
+            row[0] for row in self._db.execute(
+                "SELECT role_id FROM group_members WHERE guild_id = ? AND member_id = ? ORDER BY role_id", (int(guild_id), int(member_id))
+            )
+        ]
+
+    def has_legacy(self) -> bool:
+        return self._db.execute("SELECT 1 FROM legacy_groups LIMIT 1").fetchone() is not None
+
+    def adopt_legacy(self, role_guilds: dict, drop_unknown: bool = True) -> int:
+        """
+        Moves the legacy entries (stored without a guild) to the guild their role lives in.
+        Entries whose role is not found anymore are dropped.
+
+        @param role_guilds: `{role_id: guild_id}` of every role the bot can see.
+        @type role_guilds: dict
+        @param drop_unknown: whether to drop the entries whose role was not found, a shard process
+                             only sees its own guilds and must leave the rest to the other shards.
+        @type drop_unknown: bool
+        @return: amount of adopted entries.
+        """
+        rows = self._db.execute("SELECT owner_id, role_id, channel_id FROM legacy_groups").fetchall()
+        adopted = [
+            (role_id, role_guilds[role_id], owner_id, vc_id, 0) for owner_id, role_id, vc_id in rows if role_id in role_guilds
+        ]
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany("INSERT OR REPLACE INTO private_groups VALUES (?, ?, ?, ?, ?)", adopted)
+            self._db.executemany(
+                "INSERT OR IGNORE INTO group_members VALUES (?, ?, ?)",
+                [(role_id, guild_id, owner_id) for role_id, guild_id, owner_id, vc_id, members_known in adopted],
+            )
+            if drop_unknown:
+                self._db.execute("DELETE FROM legacy_groups")
+            else:
+                self._db.executemany("DELETE FROM legacy_groups WHERE owner_id = ?", [(row[2],) for row in adopted])
+        return len(adopted)
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM private_groups").fetchone()[0]
+
+    async def flush(self):
+        pass
+
+    def flush_sync(self):
+        pass
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    async def flush_loop(self):
+        pass
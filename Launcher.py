@@ -0,0 +1,49 @@
+import os
+import signal
+import subprocess
+import sys
+
+import BotData
+from Sharding import split_shards
+
+THIS_FOLDER = os.path.dirname(
+    os.path.abspath(__file__)
+)  #? Get relative path to our folder.
+CONFIG_FILE_PATH = os.environ.get(
+    "PVC_CONFIG_PATH", os.path.join(THIS_FOLDER, "botconfig.cfg")
+)  #? Same config file as Bot.py.
+
+
+def main():
+    """
+    Runs the bot as `shard_processes` worker processes, each owning a contiguous range of the
+    `shard_count` shards. The workers share the sqlite group store.
+    """
+    bot_data = BotData.BotData()
+    try:
+        bot_data.read_config_data(CONFIG_FILE_PATH)
+    except Exception as e:
+        print(f"{e}")
+        exit()
+    if bot_data.SHARD_COUNT <= 0:
+        print("shard_count must be set to run the launcher!")
+        exit()
+
+    workers = list()
+    for shard_ids in split_shards(bot_data.SHARD_COUNT, bot_data.SHARD_PROCESSES):
+        env = dict(os.environ, PVC_SHARD_IDS=','.join([str(shard_id) for shard_id in shard_ids]))
+        workers.append(subprocess.Popen([sys.executable, os.path.join(THIS_FOLDER, "Bot.py")], cwd=THIS_FOLDER, env=env))
+        print(f"Started worker {workers[-1].pid} for shards {shard_ids}.")
+
+    def stop_workers(signum, frame):
+        for worker in workers:
+            worker.send_signal(signal.SIGINT)
+
+    signal.signal(signal.SIGINT, stop_workers)
+    signal.signal(signal.SIGTERM, stop_workers)
+    for worker in workers:
+        worker.wait()
+
+
+if __name__ == "__main__":
+    main()
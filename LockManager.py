@@ -0,0 +1,46 @@
+import asyncio
+import contextlib
+
+
+class _LockEntry:
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class LockManager:
+    """
+    Hands out one asyncio lock per key (e.g. a `(guild_id, owner_id)` group key).
+
+    Only holders of the same key wait on each other, and a key's entry is evicted as soon as
+    no one holds or waits on it, so memory only grows with the amount of keys in use right now.
+    """
+
+    def __init__(self):
+        self._entries = dict()
+
+    @contextlib.asynccontextmanager
+    async def hold(self, key):
+        """
+        Holds the key's lock for the duration of the `async with` block.
+
+        @param key: any hashable key.
+        """
+        entry = self._entries.get(key, None)
+        if entry is None:
+            entry = self._entries[key] = _LockEntry()
+        entry.users += 1
+        try:
+            async with entry.lock:
+                yield
+        finally:
+            entry.users -= 1
+            if entry.users == 0:
+                del self._entries[key]
+
+    def locked(self, key) -> bool:
+        entry = self._entries.get(key, None)
+        return entry is not None and entry.lock.locked()
+
+    def __len__(self):
+        return len(self._entries)
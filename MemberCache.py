@@ -0,0 +1,145 @@
+import sys
+from collections import OrderedDict
+
+import discord
+
+#? Member cache policies: discord.py's default for the intents, members in voice channels only, no members at all,
+#? or only the members tracked by a private group (plus the recently mentioned ones).
+MEMBER_CACHE_POLICIES = ('default', 'voice', 'none', 'tracked')
+
+
+def member_cache_flags(policy: str, intents: discord.Intents) -> discord.MemberCacheFlags:
+    """
+    @return: the discord.py member cache flags of the policy.
+    """
+    if policy == 'default':
+        return discord.MemberCacheFlags.from_intents(intents)
+    if policy == 'none':
+        return discord.MemberCacheFlags.none()
+    #? `tracked` caches the members in voice too. Voice channel occupancy does not need them, it is read from the voice states.
+    return discord.MemberCacheFlags(online=False, voice=intents.voice_states, joined=False)
+
+
+def _object_size(obj) -> int:
+    """
+    Shallow size of an object and of its slots / attributes.
+    """
+    size = sys.getsizeof(obj)
+    for cls in type(obj).__mro__:
+        for slot in getattr(cls, '__slots__', ()):
+            value = getattr(obj, slot, None)
+            if value is not None and not isinstance(value, (int, bool, float, type(None))):
+                size += sys.getsizeof(value)
+    if hasattr(obj, '__dict__'):
+        size += sum([sys.getsizeof(value) for value in vars(obj).values()])
+    return size
+
+
+class MemberCache:
+    """
+    Bounds discord.py's member cache with the `tracked` policy.
+
+    discord.py has no cache predicate, so the members it caches (voice members, gateway member
+    requests) are trimmed afterwards: a member is kept only while they own a private group, are a
+    group's member, are in a voice channel, or are among the `lru_size` most recently mentioned
+    users (mentions are resolved through the cache first, so repeated mentions stay cheap).
+    Trimming never affects voice channel occupancy, which is read from the channels' voice states.
+    """
+
+    def __init__(self, store, get_guild, policy: str = 'default', lru_size: int = 1000):
+        """
+        @param store: the group store.
+        @type store: GroupStore or SqliteGroupStore
+        @param get_guild: returns a guild by id, None if the bot is not in it (e.g. `BOT.get_guild`).
+        @type get_guild: Callable[[int], discord.Guild]
+        @param policy: one of `MEMBER_CACHE_POLICIES`.
+        @type policy: str
+        @param lru_size: amount of recently mentioned members kept (`tracked` policy).
+        @type lru_size: int
+        """
+        self.store = store
+        self.get_guild = get_guild
+        self.policy = policy
+        self.lru_size = lru_size
+        self._recent = OrderedDict()  #? (guild_id, member_id) -> None, least recently mentioned first.
+        self.trimmed = 0  #? Total amount of members removed from the cache.
+
+    def recent_count(self) -> int:
+        return len(self._recent)
+
+    def _tracked(self, guild: discord.Guild) -> tuple:
+        owners, roles = set(), set()
+        for owner_id, role_id, vc_id in self.store.guild_groups(guild.id):
+            owners.add(owner_id)
+            roles.add(role_id)
+        return owners, roles
+
+    def _keep(self, guild: discord.Guild, member: discord.Member, owners: set, roles: set) -> bool:
+        return (
+            member.id == guild.me.id
+            or member.id in owners
+            or (guild.id, member.id) in self._recent
+            or member.voice is not None
+            or len(self.store.member_groups(guild.id, member.id)) > 0
+            or any(role.id in roles for role in member.roles)
+        )
+
+    def touch(self, guild: discord.Guild, members):
+        """
+        Marks members as recently mentioned, evicting the least recently mentioned ones past `lru_size`.
+        """
+        if self.policy != 'tracked':
+            return
+        for member in members:
+            self._recent[(guild.id, member.id)] = None
+            self._recent.move_to_end((guild.id, member.id))
+        evicted = list()
+        while len(self._recent) > self.lru_size:
+            evicted.append(self._recent.popitem(last=False)[0])
+        tracked = dict()  #? guild id -> the guild's tracked owners and roles, looked up once per guild.
+        for guild_id, member_id in evicted:
+            evicted_guild = self.get_guild(guild_id)
+            member = evicted_guild.get_member(member_id) if evicted_guild is not None else None
+            if member is None:
+                continue
+            if guild_id not in tracked:
+                tracked[guild_id] = self._tracked(evicted_guild)
+            if not self._keep(evicted_guild, member, *tracked[guild_id]):
+                evicted_guild._remove_member(member)
+                self.trimmed += 1
+
+    def trim(self, guilds) -> int:
+        """
+        Removes the members the policy does not keep from the guilds' caches.
+
+        @return: amount of removed members.
+        """
+        if self.policy != 'tracked':
+            return 0
+        removed = 0
+        for guild in guilds:
+            if guild.me is None:
+                continue
+            owners, roles = self._tracked(guild)
+            for member in [member for member in guild.members if not self._keep(guild, member, owners, roles)]:
+                #! discord.py has no public way of dropping a cached member.
+                guild._remove_member(member)
+                removed += 1
+        self.trimmed += removed
+        return removed
+
+    def footprint(self, guilds, sample_size: int = 200) -> tuple:
+        """
+        Estimates the memory held by the cached members, from the average size of a sample of them.
+
+        @return: the amount of cached members and their estimated size in bytes.
+        """
+        count, sample = 0, list()
+        for guild in guilds:
+            members = guild.members
+            count += len(members)
+            sample += members[:max(0, sample_size - len(sample))]
+        if not sample:
+            return count, 0
+        average = sum([_object_size(member) + _object_size(getattr(member, '_user', None)) for member in sample]) / len(sample)
+        return count, int(average * count)
@@ -0,0 +1,132 @@
+import asyncio
+import re
+
+import discord
+
+#? Matches both user mention forms, `<@id>` and the nickname form `<@!id>`.
+MENTION_REGEX = re.compile(r"^<@!?(\d+)>$")
+#? Matches a role mention, `<@&id>`.
+ROLE_MENTION_REGEX = re.compile(r"^<@&(\d+)>$")
+#? Max amount of user ids in a single gateway member request.
+QUERY_CHUNK_SIZE = 100
+
+
+def parse_member_ids(member_tags) -> tuple:
+    """
+    Extracts the user ids out of member mentions (raw ids are accepted as well).
+
+    @param member_tags: the raw command arguments.
+    @type member_tags: Iterable[str]
+    @return: the list of unique ids (in their original order) and the list of tags that are not mentions.
+    """
+    ids, invalid_tags = list(), list()
+    for member_tag in member_tags:
+        match = MENTION_REGEX.match(member_tag)
+        if match is not None:
+            member_id = int(match.group(1))
+        elif member_tag.isdigit():
+            member_id = int(member_tag)
+        else:
+            invalid_tags.append(member_tag)
+            continue
+        if member_id not in ids:
+            ids.append(member_id)
+    return ids, invalid_tags
+
+
+def split_role_tag(member_tags) -> tuple:
+    """
+    Splits a leading role mention off the command arguments.
+
+    @param member_tags: the raw command arguments.
+    @type member_tags: Iterable[str]
+    @return: the id of the mentioned role (None if the first argument is not a role mention) and the remaining arguments.
+    """
+    member_tags = list(member_tags)
+    match = ROLE_MENTION_REGEX.match(member_tags[0]) if member_tags else None
+    if match is None:
+        return None, member_tags
+    return int(match.group(1)), member_tags[1:]
+
+
+async def _query_members(guild: discord.Guild, member_ids: list, timeout: float) -> dict:
+    """
+    Requests the members over the gateway, in chunks of `QUERY_CHUNK_SIZE` ids.
+    """
+    found = dict()
+    for i in range(0, len(member_ids), QUERY_CHUNK_SIZE):
+        chunk = member_ids[i:i + QUERY_CHUNK_SIZE]
+        members = await asyncio.wait_for(guild.query_members(user_ids=chunk, limit=len(chunk), cache=True), timeout)
+        found.update({member.id: member for member in members})
+    return found
+
+
+async def _fetch_members(guild: discord.Guild, member_ids: list, concurrency: int) -> dict:
+    """
+    Fetches the members over REST, at most `concurrency` requests at a time.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(member_id: int):
+        async with semaphore:
+            try:
+                return await guild.fetch_member(member_id)
+            except discord.HTTPException:
+                #! Not a member of the guild (or not a user at all).
+                return None
+
+    members = await asyncio.gather(*[fetch(member_id) for member_id in member_ids])
+    return {member.id: member for member in members if member is not None}
+
+
+async def resolve_member_ids(guild: discord.Guild, member_ids: list, known: dict = None, query_timeout: float = 5.0, fetch_concurrency: int = 5) -> dict:
+    """
+    Resolves member ids, cheapest source first: the already `known` members, the guild's member cache,
+    a single gateway member request and finally (if the gateway request fails) a bounded concurrent REST fetch.
+
+    @param guild: the guild the members belong to.
+    @type guild: discord.Guild
+    @param member_ids: the ids to resolve.
+    @type member_ids: list
+    @param known: already resolved `{id: member}` (e.g. a message's mentions).
+    @type known: dict
+    @return: the `{id: member}` of every id that was found.
+    """
+    known = known or dict()
+    resolved, missing_ids = dict(), list()
+    for member_id in member_ids:
+        member = known.get(member_id, None) or guild.get_member(member_id)
+        if member is not None:
+            resolved[member_id] = member
+        else:
+            missing_ids.append(member_id)
+
+    if missing_ids:
+        try:
+            resolved.update(await _query_members(guild, missing_ids, query_timeout))
+        except (asyncio.TimeoutError, discord.ClientException, RuntimeError):
+            #? The gateway request is not available, fall back to REST.
+            resolved.update(await _fetch_members(guild, [i for i in missing_ids if i not in resolved], fetch_concurrency))
+    return resolved
+
+
+async def resolve_members(guild: discord.Guild, message: discord.Message, member_tags, query_timeout: float = 5.0, fetch_concurrency: int = 5) -> tuple:
+    """
+    Resolves the tagged members of a command, starting from the message's resolved mentions
+    (see `resolve_member_ids`).
+
+    @param guild: the guild the members belong to.
+    @type guild: discord.Guild
+    @param message: the command message (its mentions are already resolved members).
+    @type message: discord.Message
+    @param member_tags: the raw command arguments.
+    @type member_tags: Iterable[str]
+    @return: the list of resolved members (in tag order) and the list of tags that could not be resolved.
+    """
+    member_ids, invalid_tags = parse_member_ids(member_tags)
+    mentions = {member.id: member for member in message.mentions if isinstance(member, discord.Member)}
+    resolved = await resolve_member_ids(guild, member_ids, mentions, query_timeout, fetch_concurrency)
+
+    members = [resolved[member_id] for member_id in member_ids if member_id in resolved]
+    not_found = invalid_tags + [str(member_id) for member_id in member_ids if member_id not in resolved]
+    return members, not_found
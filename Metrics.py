@@ -0,0 +1,192 @@
+import asyncio
+import bisect
+import contextvars
+import logging
+import time
+from collections import defaultdict
+
+#? Name of the command currently running, REST calls made from it are attributed to it.
+CURRENT_COMMAND = contextvars.ContextVar('CURRENT_COMMAND', default='none')
+
+#? Default histogram buckets (seconds), from a cached lookup up to a rate limited batch.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """
+    Prometheus style cumulative histogram.
+    """
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimates the q-quantile by interpolating inside its bucket.
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+
+def _labels(**labels) -> str:
+    return '{' + ','.join([f'{name}="{str(value)}"' for name, value in labels.items()]) + '}' if labels else ''
+
+
+class _RateLimitHandler(logging.Handler):
+    """
+    Counts the 429 responses discord.py sleeps off (and retries) by itself, from the warning it logs before sleeping.
+    """
+
+    def __init__(self, metrics):
+        super().__init__(logging.WARNING)
+        self.metrics = metrics
+
+    def emit(self, record: logging.LogRecord):
+        #? A global rate limit logs a second warning for the same sleep, only the first one is counted.
+        if isinstance(record.msg, str) and record.msg.startswith('We are being rate limited') and record.args:
+            self.metrics.rate_limited += 1
+            self.metrics.rate_limit_wait += float(record.args[0])
+
+
+class Metrics:
+    """
+    In-process metrics of the bot: per-command latency histograms and outcome counts,
+    REST calls per command and route, and whatever gauges the collectors report at scrape time.
+    Rendered in the Prometheus text format (see `render` and `serve`).
+    """
+
+    def __init__(self):
+        self.command_latency = defaultdict(Histogram)
+        self.command_results = defaultdict(int)  #? (command, result) -> count.
+        self.rest_calls = defaultdict(int)  #? (command, route) -> count.
+        self.rest_latency = defaultdict(Histogram)
+        self.store_flush = Histogram()
+        self.store_load_seconds = 0.0
+        self.rate_limited = 0  #? 429 responses retried by discord.py.
+        self.rate_limit_wait = 0.0  #? Seconds discord.py slept them off.
+        self._collectors = list()
+
+    def add_collector(self, collector):
+        """
+        @param collector: callable returning `(name, value)` gauges, called on every scrape.
+        @type collector: Callable[[], Iterable[Tuple[str, float]]]
+        """
+        self._collectors.append(collector)
+
+    def command_started(self, name: str) -> float:
+        CURRENT_COMMAND.set(name)
+        return time.perf_counter()
+
+    def command_finished(self, name: str, started: float, failed: bool) -> float:
+        """
+        @return: the command's latency (seconds).
+        """
+        latency = time.perf_counter() - started
+        self.command_latency[name].observe(latency)
+        self.command_results[(name, 'error' if failed else 'success')] += 1
+        return latency
+
+    def instrument_http(self, http):
+        """
+        Wraps the discord.py HTTP client's `request` to count and time every REST call.
+
+        @param http: the bot's `discord.http.HTTPClient`.
+        """
+        request = http.request
+
+        async def instrumented_request(route, **kwargs):
+            route_name = f'{route.method} {route.path}'
+            self.rest_calls[(CURRENT_COMMAND.get(), route_name)] += 1
+            started = time.perf_counter()
+            try:
+                return await request(route, **kwargs)
+            finally:
+                self.rest_latency[route_name].observe(time.perf_counter() - started)
+
+        http.request = instrumented_request
+        logging.getLogger('discord.http').addHandler(_RateLimitHandler(self))
+
+    def render(self) -> str:
+        """
+        @return: every metric in the Prometheus text exposition format.
+        """
+        lines = list()
+
+        def histogram(name: str, hist: Histogram, **labels):
+            cumulative = 0
+            for bound, count in zip(hist.buckets + ('+Inf',), hist.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{_labels(**labels, le=bound)} {cumulative}')
+            lines.append(f'{name}_sum{_labels(**labels)} {hist.sum}')
+            lines.append(f'{name}_count{_labels(**labels)} {hist.count}')
+
+        lines.append('# TYPE pvc_command_seconds histogram')
+        for command, hist in self.command_latency.items():
+            histogram('pvc_command_seconds', hist, command=command)
+        lines.append('# TYPE pvc_commands_total counter')
+        for (command, result), count in self.command_results.items():
+            lines.append(f'pvc_commands_total{_labels(command=command, result=result)} {count}')
+        lines.append('# TYPE pvc_rest_calls_total counter')
+        for (command, route), count in self.rest_calls.items():
+            lines.append(f'pvc_rest_calls_total{_labels(command=command, route=route)} {count}')
+        lines.append('# TYPE pvc_rest_seconds histogram')
+        for route, hist in self.rest_latency.items():
+            histogram('pvc_rest_seconds', hist, route=route)
+        lines.append('# TYPE pvc_store_flush_seconds histogram')
+        histogram('pvc_store_flush_seconds', self.store_flush)
+        lines.append('# TYPE pvc_rate_limited_total counter')
+        lines.append(f'pvc_rate_limited_total {self.rate_limited}')
+        lines.append('# TYPE pvc_rate_limit_wait_seconds_total counter')
+        lines.append(f'pvc_rate_limit_wait_seconds_total {self.rate_limit_wait}')
+        lines.append('# TYPE pvc_store_load_seconds gauge')
+        lines.append(f'pvc_store_load_seconds {self.store_load_seconds}')
+        for collector in self._collectors:
+            for name, value in collector():
+                lines.append(f'# TYPE {name} gauge')
+                lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+    async def _handle_scrape(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await reader.readline()
+            #? Skip the request headers.
+            while (await reader.readline()).strip():
+                pass
+            if request_line.split(b' ')[1:2] in ([b'/metrics'], [b'/']):
+                status, body = '200 OK', self.render().encode()
+            else:
+                status, body = '404 Not Found', b'not found\n'
+            writer.write(
+                f'HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4\r\n'
+                f'Content-Length: {len(body)}\r\nConnection: close\r\n\r\n'.encode() + body
+            )
+            await writer.drain()
+        except (ConnectionError, IndexError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int):
+        """
+        Serves the metrics over HTTP (`GET /metrics`) until cancelled.
+        """
+        server = await asyncio.start_server(self._handle_scrape, host, port)
+        async with server:
+            await server.serve_forever()
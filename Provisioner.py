@@ -0,0 +1,323 @@
+import asyncio
+import json
+import sqlite3
+import time
+
+import discord
+
+from EventLog import EVENT_LOG, LOG_CONTEXT
+from GroupActions import purge_group
+from MemberResolver import resolve_member_ids
+from Metrics import CURRENT_COMMAND
+
+#? Steps of a create job, in order. Every step is checkpointed in the outbox once it is done.
+CREATE_STEPS = ('create_role', 'assign_roles', 'create_channel', 'save', 'done')
+#? Steps of a purge job.
+PURGE_STEPS = ('purge', 'done')
+
+
+class Job:
+    """
+    A provisioning job, as stored in the outbox.
+    """
+
+    def __init__(self, job_id: int, kind: str, guild_id: int, owner_id: int, channel_id: int, message_id: int, step: str, state: dict):
+        self.id = job_id
+        self.kind = kind
+        self.guild_id = guild_id
+        self.owner_id = owner_id
+        self.channel_id = channel_id
+        self.message_id = message_id
+        self.step = step
+        self.state = state
+
+
+class Outbox:
+    """
+    Durable sqlite log of the provisioning jobs and their last completed step.
+    """
+
+    def __init__(self, path: str):
+        """
+        @param path: path to the sqlite outbox file.
+        @type path: str
+        """
+        self.path = path
+        self._db = None
+
+    def load(self):
+        self._db = sqlite3.connect(self.path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                guild_id INTEGER NOT NULL,
+                owner_id INTEGER NOT NULL,
+                channel_id INTEGER NOT NULL,
+                message_id INTEGER NOT NULL,
+                step TEXT NOT NULL,
+                state TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (step, guild_id, owner_id);
+        """)
+
+    def add(self, kind: str, guild_id: int, owner_id: int, channel_id: int, message_id: int, state: dict) -> Job:
+        step = CREATE_STEPS[0] if kind == 'create' else PURGE_STEPS[0]
+        cursor = self._db.execute(
+            "INSERT INTO jobs (kind, guild_id, owner_id, channel_id, message_id, step, state, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (kind, guild_id, owner_id, channel_id, message_id, step, json.dumps(state), time.time()),
+        )
+        return Job(cursor.lastrowid, kind, guild_id, owner_id, channel_id, message_id, step, state)
+
+    def checkpoint(self, job: Job, step: str):
+        """
+        Records that the job reached `step`, together with its current state.
+        """
+        job.step = step
+        self._db.execute("UPDATE jobs SET step = ?, state = ? WHERE id = ?", (step, json.dumps(job.state), job.id))
+
+    def has_pending(self, guild_id: int, owner_id: int) -> bool:
+        return self._db.execute(
+            "SELECT 1 FROM jobs WHERE step NOT IN ('done', 'failed') AND guild_id = ? AND owner_id = ? LIMIT 1", (guild_id, owner_id)
+        ).fetchone() is not None
+
+    def pending(self) -> list:
+        rows = self._db.execute(
+            "SELECT id, kind, guild_id, owner_id, channel_id, message_id, step, state FROM jobs WHERE step NOT IN ('done', 'failed') ORDER BY id"
+        ).fetchall()
+        return [Job(*row[:-1], json.loads(row[-1])) for row in rows]
+
+    def pending_ids(self, guild_id: int) -> set:
+        """
+        @return: ids of the roles and channels the guild's unfinished create jobs made so far.
+        """
+        rows = self._db.execute(
+            "SELECT state FROM jobs WHERE step NOT IN ('done', 'failed') AND guild_id = ? AND kind = 'create'", (guild_id,)
+        ).fetchall()
+        ids = set()
+        for (state,) in rows:
+            state = json.loads(state)
+            ids.update([state[key] for key in ('role_id', 'vc_id') if state.get(key, None) is not None])
+        return ids
+
+    def prune(self, older_than: float):
+        """
+        Deletes the finished jobs older than `older_than` seconds.
+        """
+        self._db.execute("DELETE FROM jobs WHERE step IN ('done', 'failed') AND created_at < ?", (time.time() - older_than,))
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class Provisioner:
+    """
+    Runs group creations and deletions in the background.
+
+    Commands validate, `submit` the job to the outbox and reply right away. A bounded pool of
+    workers runs the jobs step by step, checkpointing every step, so a job interrupted by a
+    restart resumes from its last completed step (`resume`). Every step is idempotent when
+    replayed from its checkpoint. Workers hold the group's lock while running its job.
+    Finished jobs are pruned from the outbox once they are older than `retention` seconds.
+    """
+
+    def __init__(self, outbox: Outbox, store, category_cache, role_executor, group_locks, get_guild, notify, on_created=None, workers: int = 4, retention: float = 86400.0):
+        """
+        @param outbox: the durable job log.
+        @type outbox: Outbox
+        @param store: the group store.
+        @param category_cache: cache of the private voice channels categories.
+        @param role_executor: runs the role assignments.
+        @param group_locks: the `(guild_id, owner_id)` group locks the commands hold.
+        @param get_guild: returns a guild by id, None if the bot is not in it (e.g. `BOT.get_guild`).
+        @type get_guild: Callable[[int], discord.Guild]
+        @param notify: coroutine function `(guild, job, kind, title, text)` reporting a job's outcome.
+        @param on_created: called with the new voice channel once a group is created (optional).
+        @param workers: amount of worker tasks.
+        @type workers: int
+        @param retention: seconds the finished jobs are kept in the outbox.
+        @type retention: float
+        """
+        self.outbox = outbox
+        self.store = store
+        self.category_cache = category_cache
+        self.role_executor = role_executor
+        self.group_locks = group_locks
+        self.get_guild = get_guild
+        self.notify = notify
+        self.on_created = on_created
+        self.workers = workers
+        self.retention = retention
+        self._queue = asyncio.Queue()
+        self._queued = set()  #? Ids of the jobs queued or running.
+
+    def _enqueue(self, job: Job):
+        self._queued.add(job.id)
+        self._queue.put_nowait(job)
+
+    def submit_create(self, guild_id: int, owner_id: int, owner_name: str, member_ids: list, channel_id: int, message_id: int) -> Job:
+        job = self.outbox.add('create', guild_id, owner_id, channel_id, message_id, {'owner_name': owner_name, 'member_ids': member_ids})
+        self._enqueue(job)
+        return job
+
+    def submit_purge(self, guild_id: int, owner_id: int, role_id: int, channel_id: int, message_id: int) -> Job:
+        job = self.outbox.add('purge', guild_id, owner_id, channel_id, message_id, {'role_id': role_id})
+        self._enqueue(job)
+        return job
+
+    def is_pending(self, guild_id: int, owner_id: int) -> bool:
+        return self.outbox.has_pending(guild_id, owner_id)
+
+    def resume(self) -> int:
+        """
+        Requeues the unfinished jobs of the guilds this process serves.
+
+        @return: amount of resumed jobs.
+        """
+        jobs = [
+            job for job in self.outbox.pending() if job.id not in self._queued and self.get_guild(job.guild_id) is not None
+        ]
+        for job in jobs:
+            self._enqueue(job)
+        return len(jobs)
+
+    def start(self):
+        for _ in range(self.workers):
+            asyncio.ensure_future(self._worker())
+        asyncio.ensure_future(self._prune_loop())
+
+    async def _prune_loop(self):
+        """
+        Deletes the old finished jobs every hour.
+        """
+        while True:
+            try:
+                self.outbox.prune(self.retention)
+            except sqlite3.Error as e:
+                EVENT_LOG.error('outbox_prune_failed', e)
+            await asyncio.sleep(3600)
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            #? The job's REST calls and records are attributed to the command that submitted it.
+            command = f'{job.kind}_pvc'
+            CURRENT_COMMAND.set(command)
+            LOG_CONTEXT.set({'guild': job.guild_id, 'owner': job.owner_id, 'command': command, 'job': job.id})
+            try:
+                async with self.group_locks.hold((job.guild_id, job.owner_id)):
+                    await self._run(job)
+            except Exception as e:
+                #? `_fail` deletes whatever the job created so far.
+                EVENT_LOG.error('provisioning_failed', e, step=job.step)
+                await self._fail(job, "Error", "Something went wrong, please contact your administrator or try again later.")
+            finally:
+                self._queued.discard(job.id)
+                self._queue.task_done()
+
+    async def _notify(self, job: Job, kind: str, title: str, text: str):
+        guild = self.get_guild(job.guild_id)
+        if guild is not None:
+            try:
+                await self.notify(guild, job, kind, title, text)
+            except discord.HTTPException:
+                pass
+
+    async def _fail(self, job: Job, title: str, text: str):
+        self.outbox.checkpoint(job, 'failed')
+        await self._discard(job)
+        await self._notify(job, 'error', title, text)
+
+    async def _discard(self, job: Job):
+        """
+        Deletes the role and channel a failed creation made so far, unless the group was saved.
+        Whatever could not be deleted is left to the reconciler's next sweep.
+        """
+        guild = self.get_guild(job.guild_id)
+        role_id, vc_id = job.state.get('role_id', None), job.state.get('vc_id', None)
+        if job.kind != 'create' or guild is None or role_id is None or self.store.get_group(role_id) is not None:
+            return
+        #? Delete by id, the role may not be cached yet (discord.py only caches it on the role create event).
+        http = guild._state.http
+        deletes = [(http.delete_role, (guild.id, role_id))]
+        if vc_id is not None:
+            deletes.append((http.delete_channel, (vc_id,)))
+        for delete, args in deletes:
+            try:
+                await delete(*args)
+            except discord.NotFound:
+                pass
+            except discord.HTTPException as e:
+                EVENT_LOG.error('provisioning_discard_failed', e)
+
+    async def _run(self, job: Job):
+        guild = self.get_guild(job.guild_id)
+        if guild is None:
+            self.outbox.checkpoint(job, 'failed')
+            return
+        if job.kind == 'purge':
+            await self._run_purge(guild, job)
+        else:
+            await self._run_create(guild, job)
+
+    async def _run_purge(self, guild: discord.Guild, job: Job):
+        role_id = job.state.get('role_id', None)
+        #? Jobs logged before owners could have several groups purge all of the owner's groups.
+        role_ids = [role_id] if role_id is not None else [group[0] for group in self.store.owner_groups(guild.id, job.owner_id)]
+        complete = len(role_ids) > 0
+        for role_id in role_ids:
+            complete = await purge_group(self.store, guild, role_id) and complete
+        if not complete:
+            self.outbox.checkpoint(job, 'done')
+            await self._notify(job, 'error', "Currupted Database", 'An error occured in the database, deleting information from the database! Please contanct your admin or remove the problematic group by hand!')
+            return
+        self.outbox.checkpoint(job, 'done')
+        await self._notify(job, 'success', "Group Deleted Successfully", "The private group was successfully deleted!")
+
+    async def _run_create(self, guild: discord.Guild, job: Job):
+        state = job.state
+        if job.step == 'create_role':
+            role = await guild.create_role(name=f"{state['owner_name']}'s Private Group", mentionable=True, colour=discord.Color.random())
+            state['role_id'] = role.id
+            self.outbox.checkpoint(job, 'assign_roles')
+        else:
+            #? Resumed job, the role was created by an earlier run and is in the cache by now.
+            role = guild.get_role(state['role_id'])
+        if role is None:
+            await self._fail(job, "Group Creation Failed", "The group's role was deleted while it was being created!")
+            return
+
+        if job.step == 'assign_roles':
+            members = await resolve_member_ids(guild, state['member_ids'])
+            results = await self.role_executor.add_role(guild, list(members.values()), role)
+            state['added_ids'] = [result.member.id for result in results if result.error is None]
+            state['failed_ids'] = [member_id for member_id in state['member_ids'] if member_id not in state['added_ids']]
+            self.outbox.checkpoint(job, 'create_channel')
+
+        if job.step == 'create_channel':
+            category = await self.category_cache.get_or_create(guild)
+            #? Create vc permissions to only allow the role's members to connect.
+            overwrites = {
+                guild.default_role: discord.PermissionOverwrite(connect=False, speak=False),
+                role: discord.PermissionOverwrite(connect=True, speak=True),
+            }
+            vc = await category.create_voice_channel(f"{state['owner_name']}'s Private Voice Channel", user_limit=len(state['added_ids']), overwrites=overwrites)
+            state['vc_id'] = vc.id
+            self.outbox.checkpoint(job, 'save')
+        else:
+            vc = guild.get_channel(state['vc_id'])
+        if job.step == 'save':
+            self.store.set(guild.id, job.owner_id, role.id, state['vc_id'], state['added_ids'])
+            if self.on_created is not None and vc is not None:
+                self.on_created(vc)
+            self.outbox.checkpoint(job, 'done')
+
+        text = f'Successfully created a private voice channel {vc.name if vc else ""} for members {", ".join([f"<@{member_id}>" for member_id in state["added_ids"]])}!'
+        if state['failed_ids']:
+            text += f'\nCould not add {", ".join([f"<@{member_id}>" for member_id in state["failed_ids"]])}.'
+        await self._notify(job, 'success', "Group Created Successfully", text)
@@ -0,0 +1,121 @@
+import asyncio
+import heapq
+import time
+
+import discord
+
+from EventLog import EVENT_LOG
+from GroupActions import purge_group
+
+
+class Reaper:
+    """
+    Deletes private groups whose voice channel stayed empty for `ttl` seconds.
+
+    Occupancy is tracked from voice state updates. Every empty channel has a deadline in a
+    single heap, and one task sleeps until the earliest deadline and purges every expired
+    group in one batch. A channel that fills up again has its deadline cancelled lazily
+    (its heap entry is skipped once popped).
+    """
+
+    def __init__(self, store, group_locks, ttl: float = 3600.0, batch_size: int = 10):
+        """
+        @param store: the group store.
+        @type store: GroupStore or SqliteGroupStore
+        @param group_locks: the `(guild_id, owner_id)` group locks the commands hold.
+        @type group_locks: LockManager
+        @param ttl: seconds a group's channel may stay empty before the group is purged (0 disables the reaper).
+        @type ttl: float
+        @param batch_size: max amount of groups purged concurrently.
+        @type batch_size: int
+        """
+        self.store = store
+        self.group_locks = group_locks
+        self.ttl = ttl
+        self.batch_size = batch_size
+        self._heap = list()
+        self._deadlines = dict()  #? channel id -> (deadline, guild).
+        self._wakeup = asyncio.Event()
+
+    def schedule(self, channel: discord.VoiceChannel):
+        """
+        Starts the channel's countdown, if it is an empty group channel.
+        """
+        #? `voice_states` does not depend on the member cache, unlike `members`.
+        if self.ttl <= 0 or channel.voice_states or self.store.group_by_channel(channel.id) is None:
+            return
+        if channel.id in self._deadlines:
+            return
+        deadline = time.monotonic() + self.ttl
+        self._deadlines[channel.id] = (deadline, channel.guild)
+        heapq.heappush(self._heap, (deadline, channel.id))
+        if self._heap[0][1] == channel.id:
+            #? New earliest deadline, wake the loop up so it sleeps for the right amount.
+            self._wakeup.set()
+
+    def cancel(self, channel_id: int):
+        self._deadlines.pop(channel_id, None)
+
+    def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
+        if before.channel == after.channel:
+            return
+        if after.channel is not None:
+            self.cancel(after.channel.id)
+        if isinstance(before.channel, discord.VoiceChannel):
+            self.schedule(before.channel)
+
+    def schedule_guilds(self, guilds):
+        """
+        Starts the countdown of every empty group channel (used on startup).
+        """
+        for guild in guilds:
+            for owner_id, role_id, vc_id in self.store.guild_groups(guild.id):
+                vc = guild.get_channel(vc_id)
+                if isinstance(vc, discord.VoiceChannel):
+                    self.schedule(vc)
+
+    def _pop_expired(self) -> list:
+        now = time.monotonic()
+        expired = list()
+        while self._heap and self._heap[0][0] <= now:
+            deadline, channel_id = heapq.heappop(self._heap)
+            entry = self._deadlines.get(channel_id, None)
+            #? Skip cancelled (or rescheduled) countdowns.
+            if entry is not None and entry[0] == deadline:
+                del self._deadlines[channel_id]
+                expired.append((channel_id, entry[1]))
+        return expired
+
+    async def _reap(self, channel_id: int, guild: discord.Guild):
+        role_id = self.store.group_by_channel(channel_id)
+        group = self.store.get_group(role_id) if role_id is not None else None
+        if group is None:
+            return
+        async with self.group_locks.hold((group[0], group[1])):
+            vc = guild.get_channel(channel_id)
+            #? Someone might have joined while we waited on the lock.
+            if vc is not None and vc.voice_states:
+                return
+            await purge_group(self.store, guild, role_id)
+
+    async def run(self):
+        """
+        Reaps expired groups until cancelled.
+        """
+        while True:
+            self._wakeup.clear()
+            timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+            expired = self._pop_expired()
+            for i in range(0, len(expired), self.batch_size):
+                results = await asyncio.gather(
+                    *[self._reap(channel_id, guild) for channel_id, guild in expired[i:i + self.batch_size]],
+                    return_exceptions=True,
+                )
+                for result in results:
+                    if isinstance(result, Exception):
+                        EVENT_LOG.error('reap_failed', result)
@@ -0,0 +1,147 @@
+import asyncio
+import datetime
+import time
+
+import discord
+
+from EventLog import EVENT_LOG
+from GroupActions import purge_group
+
+#? Suffixes of the role and channel names `create_pvc` gives a group.
+GROUP_ROLE_SUFFIX = "'s Private Group"
+GROUP_VC_SUFFIX = "'s Private Voice Channel"
+
+
+class Reconciler:
+    """
+    Keeps the group store in sync with the guilds.
+
+    Gateway events (role / channel deleted, bot removed from a guild) update the store
+    incrementally through its reverse indexes, and `sweep` reconciles every guild in one
+    bounded-concurrency pass on startup, to catch whatever happened while the bot was down.
+    """
+
+    def __init__(self, store, category_cache, group_locks, concurrency: int = 5, orphan_grace: float = 600.0, pending_ids=None):
+        """
+        @param store: the group store.
+        @type store: GroupStore or SqliteGroupStore
+        @param category_cache: cache of the private voice channels categories.
+        @type category_cache: CategoryCache
+        @param group_locks: the `(guild_id, owner_id)` group locks the commands hold.
+        @type group_locks: LockManager
+        @param concurrency: max amount of guilds swept at the same time.
+        @type concurrency: int
+        @param orphan_grace: seconds an untracked group role / channel may exist before it is considered
+                             an orphan (so groups that are being created right now are left alone).
+        @type orphan_grace: float
+        @param pending_ids: returns the ids of the roles and channels of a guild's unfinished group creations,
+                            which are never orphans whatever their age (e.g. `Outbox.pending_ids`, optional).
+        @type pending_ids: Callable[[int], set]
+        """
+        self.store = store
+        self.category_cache = category_cache
+        self.group_locks = group_locks
+        self.concurrency = concurrency
+        self.orphan_grace = orphan_grace
+        self.pending_ids = pending_ids
+        #? guild id -> unix time of the guild's last sweep, the least recently swept guilds are swept first.
+        self.watermarks = dict()
+
+    async def _purge(self, guild: discord.Guild, owner_id: int, role_id: int):
+        async with self.group_locks.hold((guild.id, owner_id)):
+            await purge_group(self.store, guild, role_id)
+
+    async def on_role_delete(self, role: discord.Role):
+        """
+        A group's role was deleted, the group is unusable so the rest of it is purged.
+        """
+        group = self.store.get_group(role.id)
+        if group is not None:
+            await self._purge(role.guild, group[1], role.id)
+
+    async def on_channel_delete(self, channel):
+        """
+        A group's voice channel was deleted, the group is unusable so the rest of it is purged.
+        """
+        role_id = self.store.group_by_channel(channel.id)
+        group = self.store.get_group(role_id) if role_id is not None else None
+        if group is not None:
+            await self._purge(channel.guild, group[1], role_id)
+
+    def on_guild_remove(self, guild: discord.Guild):
+        """
+        The bot left the guild, its roles and channels are out of reach so only the store is cleaned.
+        """
+        self.store.delete_guild(guild.id)
+        self.watermarks.pop(guild.id, None)
+
+    def _is_orphan(self, obj, suffix: str, tracked_ids: set, now: datetime.datetime) -> bool:
+        return (
+            obj.id not in tracked_ids
+            and obj.name.endswith(suffix)
+            and (now - obj.created_at).total_seconds() > self.orphan_grace
+        )
+
+    async def sweep_guild(self, guild: discord.Guild) -> int:
+        """
+        Purges the guild's broken groups (role or channel missing) and deletes the orphaned
+        group roles and channels that no stored group uses (left by crashed creations).
+        Only the guild's cache is read, REST calls are made for deletions alone.
+
+        @return: amount of purged groups and deleted orphans.
+        """
+        fixed = 0
+        tracked_roles, tracked_channels = set(), set()
+        for owner_id, role_id, vc_id in self.store.guild_groups(guild.id):
+            role = guild.get_role(role_id)
+            if role is None or guild.get_channel(vc_id) is None:
+                await self._purge(guild, owner_id, role_id)
+                fixed += 1
+            else:
+                if guild.chunked and self.store.group_members(role_id) is None:
+                    #? Groups migrated without their members get them from the role's holders.
+                    self.store.set_members(role_id, [member.id for member in role.members])
+                tracked_roles.add(role_id)
+                tracked_channels.add(vc_id)
+
+        if self.pending_ids is not None:
+            #? A creation waiting on rate limits or a restart can outlive the grace period.
+            pending = self.pending_ids(guild.id)
+            tracked_roles |= pending
+            tracked_channels |= pending
+        #? `created_at` is a naive utc datetime.
+        now = datetime.datetime.utcnow()
+        orphans = [role for role in guild.roles if self._is_orphan(role, GROUP_ROLE_SUFFIX, tracked_roles, now)]
+        category = self.category_cache.get(guild)
+        if category is not None:
+            orphans += [vc for vc in category.voice_channels if self._is_orphan(vc, GROUP_VC_SUFFIX, tracked_channels, now)]
+        for orphan in orphans:
+            try:
+                await orphan.delete()
+                fixed += 1
+            except discord.HTTPException:
+                pass
+        return fixed
+
+    async def sweep(self, guilds) -> int:
+        """
+        Sweeps every guild, at most `concurrency` guilds at a time, least recently swept first.
+
+        @param guilds: the guilds to sweep.
+        @type guilds: Iterable[discord.Guild]
+        @return: total amount of purged groups and deleted orphans.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def sweep_one(guild: discord.Guild) -> int:
+            async with semaphore:
+                try:
+                    fixed = await self.sweep_guild(guild)
+                except discord.HTTPException as e:
+                    EVENT_LOG.error('reconcile_failed', e, guild=guild.id)
+                    return 0
+                self.watermarks[guild.id] = time.time()
+                return fixed
+
+        guilds = sorted(guilds, key=lambda guild: self.watermarks.get(guild.id, 0.0))
+        return sum(await asyncio.gather(*[sweep_one(guild) for guild in guilds]))
@@ -0,0 +1,150 @@
+import bisect
+
+import discord
+
+#? Discord allows at most 25 fields per embed.
+MAX_EMBED_FIELDS = 25
+#? Guild names per botinfo page, keeps a page within the embed field size limit (1024 characters).
+GUILDS_PER_PAGE = 10
+
+
+class HelpCache:
+    """
+    Prebuilt help embeds: the (paginated) command overview and one detailed embed per command,
+    looked up by command name or alias in O(1).
+    """
+
+    def __init__(self):
+        self.overview_pages = list()
+        self._details = dict()
+
+    def build(self, commands, prefix: str, avatar_url):
+        """
+        Builds every help embed once.
+
+        @param commands: the bot's commands.
+        @type commands: Iterable[discord.ext.commands.Command]
+        @param prefix: the bot's command prefix.
+        @type prefix: str
+        @param avatar_url: the bot's avatar, shown in the overview.
+        """
+        commands = sorted(commands, key=lambda cmd: cmd.name)
+        self.overview_pages, self._details = list(), dict()
+        page_count = max(1, -(-len(commands) // MAX_EMBED_FIELDS))
+        for page in range(page_count):
+            embed = discord.Embed(color=discord.Color.gold())
+            embed.set_thumbnail(url=avatar_url)
+            embed.set_footer(text=f"Senior Bot's Commands ({page + 1}/{page_count})")
+            for cmd in commands[page * MAX_EMBED_FIELDS:(page + 1) * MAX_EMBED_FIELDS]:
+                embed.add_field(
+                    name=str(f"♿|**{prefix}{cmd.name}**: "),
+                    value=str(f"❓ {cmd.brief}"),
+                    inline=False,
+                )
+            self.overview_pages.append(embed)
+
+        for cmd in commands:
+            embed = self._build_details(cmd)
+            for name in [cmd.name, *cmd.aliases]:
+                self._details[name] = embed
+
+    @staticmethod
+    def _build_details(cmd) -> discord.Embed:
+        # Check if command has any aliases, if not return 'None'.
+        if len(cmd.aliases) == 0:
+            aliases_str = "None"
+        else:
+            aliases_str = ", ".join([f'"{alias}"' for alias in cmd.aliases])
+
+        embed = discord.Embed(color=discord.Color.dark_orange())
+        embed.set_footer(text=f'"{cmd.name}" thorough description')
+        embed.add_field(name="💬 Command Name 💬", value=cmd.name, inline=False)
+        embed.add_field(name="❓ Brief Explanation ❓", value=cmd.brief, inline=False)
+        embed.add_field(name="📰 Description 📰", value=cmd.description, inline=False)
+        embed.add_field(name="⚙ Command Usage ⚙", value=cmd.usage, inline=False)
+        embed.add_field(name="🎭 Command Name Aliases 🎭", value=aliases_str, inline=False)
+        return embed
+
+    def is_built(self) -> bool:
+        return len(self.overview_pages) > 0
+
+    def overview(self, page: int = 1) -> discord.Embed:
+        """
+        @return: the overview page (1 based, clamped to the existing pages).
+        """
+        return self.overview_pages[max(1, min(page, len(self.overview_pages))) - 1]
+
+    def details(self, name: str) -> discord.Embed:
+        """
+        @return: the detailed embed of the command with this name or alias, None if there is none.
+        """
+        return self._details.get(name, None)
+
+
+class GuildIndex:
+    """
+    Name sorted index of the bot's guilds, kept current by the guild events instead of being
+    rebuilt from `BOT.guilds` on every call. Pages of it are rendered once and cached until the
+    index changes.
+    """
+
+    def __init__(self, page_size: int = GUILDS_PER_PAGE):
+        self.page_size = page_size
+        self._entries = list()  #? Sorted `(name, guild_id)` tuples.
+        self._names = dict()  #? guild id -> name.
+        self._pages = dict()
+
+    def rebuild(self, guilds):
+        self.restore({guild.id: guild.name for guild in guilds})
+
+    def restore(self, names: dict):
+        """
+        @param names: `{guild_id: name}` of every guild.
+        """
+        self._names = dict(names)
+        self._entries = sorted([(name, guild_id) for guild_id, name in self._names.items()])
+        self._pages = dict()
+
+    def add(self, guild):
+        if guild.id in self._names:
+            self.remove(guild.id)
+        self._names[guild.id] = guild.name
+        bisect.insort(self._entries, (guild.name, guild.id))
+        self._pages = dict()
+
+    def remove(self, guild_id: int):
+        name = self._names.pop(guild_id, None)
+        if name is None:
+            return
+        i = bisect.bisect_left(self._entries, (name, guild_id))
+        if i < len(self._entries) and self._entries[i] == (name, guild_id):
+            del self._entries[i]
+        self._pages = dict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def names(self) -> dict:
+        return dict(self._names)
+
+    def page_count(self) -> int:
+        return max(1, -(-len(self._entries) // self.page_size))
+
+    def page(self, page: int) -> str:
+        """
+        @param page: the page number (1 based, clamped to the existing pages).
+        @return: the page's guild list, rendered.
+        """
+        page = max(1, min(page, self.page_count()))
+        rendered = self._pages.get(page, None)
+        if rendered is None:
+            entries = self._entries[(page - 1) * self.page_size:page * self.page_size]
+            rendered = self._pages[page] = render_guild_names([name for name, guild_id in entries])
+        return rendered
+
+
+def render_guild_names(names: list) -> str:
+    """
+    Renders a page of guild names, cut to fit in an embed field.
+    """
+    return '\n'.join([str('- ' + name[:90]) for name in names])[:1024] or "None"
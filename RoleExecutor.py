@@ -0,0 +1,101 @@
+import asyncio
+import time
+from collections import namedtuple
+
+import discord
+
+#? Outcome of a single role mutation, `error` is None when it succeeded.
+RoleResult = namedtuple('RoleResult', ['member', 'error'])
+
+
+class _Bucket:
+    """
+    Client side view of one guild's member-role rate-limit bucket.
+    """
+
+    def __init__(self, size: int):
+        self.semaphore = asyncio.Semaphore(size)
+        self.resume_at = 0.0
+        self.remaining = size
+
+    async def wait_until_open(self):
+        delay = self.resume_at - time.monotonic()
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = self.resume_at - time.monotonic()
+
+    def update(self, headers):
+        """
+        Updates the bucket's budget out of a response's rate-limit headers.
+        """
+        remaining = headers.get('X-RateLimit-Remaining', None)
+        if remaining is not None:
+            self.remaining = int(remaining)
+        reset_after = headers.get('X-RateLimit-Reset-After', None) or headers.get('Retry-After', None)
+        if reset_after is not None and (self.remaining == 0 or remaining is None):
+            self.resume_at = max(self.resume_at, time.monotonic() + float(reset_after))
+
+
+class RoleExecutor:
+    """
+    Runs `add_roles` / `remove_roles` calls concurrently instead of one member at a time.
+
+    All member-role routes of a guild share the same Discord rate-limit bucket, so each guild
+    gets its own bucket with at most `bucket_size` calls in flight. A 429 that makes it through
+    discord.py closes the guild's bucket for the advised delay, and the call is retried
+    instead of failing the command.
+    """
+
+    def __init__(self, bucket_size: int = 10, max_retries: int = 3):
+        """
+        @param bucket_size: max concurrent role calls per guild.
+        @type bucket_size: int
+        @param max_retries: amount of retries of a rate limited call before giving up on it.
+        @type max_retries: int
+        """
+        self.bucket_size = bucket_size
+        self.max_retries = max_retries
+        self.rate_limit_wait = 0.0  #? Total seconds spent waiting on closed buckets.
+        self._buckets = dict()
+
+    def _get_bucket(self, guild_id: int) -> _Bucket:
+        bucket = self._buckets.get(guild_id, None)
+        if bucket is None:
+            bucket = self._buckets[guild_id] = _Bucket(self.bucket_size)
+        return bucket
+
+    async def _run_one(self, bucket: _Bucket, member: discord.Member, mutation) -> RoleResult:
+        for tries in range(self.max_retries + 1):
+            async with bucket.semaphore:
+                started_waiting = time.monotonic()
+                await bucket.wait_until_open()
+                self.rate_limit_wait += time.monotonic() - started_waiting
+                try:
+                    await mutation(member)
+                    return RoleResult(member, None)
+                except discord.HTTPException as e:
+                    if e.response is not None:
+                        bucket.update(e.response.headers)
+                    if e.status != 429 or tries == self.max_retries:
+                        return RoleResult(member, e)
+
+    async def run(self, guild: discord.Guild, members, mutation) -> list:
+        """
+        Runs `mutation` on every member concurrently, within the guild's bucket.
+
+        @param guild: the guild the members belong to.
+        @type guild: discord.Guild
+        @param members: the members to mutate.
+        @type members: Iterable[discord.Member]
+        @param mutation: coroutine function applied to every member.
+        @type mutation: Callable[[discord.Member], Awaitable]
+        @return: a `RoleResult` per member, in the members' order.
+        """
+        bucket = self._get_bucket(guild.id)
+        return await asyncio.gather(*[self._run_one(bucket, member, mutation) for member in members])
+
+    async def add_role(self, guild: discord.Guild, members, role: discord.Role) -> list:
+        return await self.run(guild, members, lambda member: member.add_roles(role))
+
+    async def remove_role(self, guild: discord.Guild, members, role: discord.Role) -> list:
+        return await self.run(guild, members, lambda member: member.remove_roles(role))
@@ -0,0 +1,106 @@
+import sqlite3
+
+
+def parse_shard_ids(value: str) -> list:
+    """
+    @param value: comma separated shard ids (e.g. `"0,1,2"`).
+    @type value: str
+    @return: the list of shard ids, None for an empty value.
+    """
+    if not value:
+        return None
+    return [int(shard_id) for shard_id in value.split(',')]
+
+
+def split_shards(shard_count: int, processes: int) -> list:
+    """
+    Splits the shards into `processes` contiguous ranges, as even as possible.
+
+    @return: a list of shard id lists, one per process.
+    """
+    processes = max(1, min(processes, shard_count))
+    size, extra = divmod(shard_count, processes)
+    ranges, start = list(), 0
+    for i in range(processes):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+class ShardDirectory:
+    """
+    Guild directory shared by every shard process, kept in the sqlite group database.
+
+    Each process owns the rows of its shards, so cross-shard views (guild counts and names)
+    are a single query instead of a round trip to every process.
+    """
+
+    def __init__(self, path: str):
+        """
+        @param path: path to the sqlite database file (the one the group store uses).
+        @type path: str
+        """
+        self.path = path
+        self._db = None
+
+    def load(self):
+        self._db = sqlite3.connect(self.path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS shard_guilds (
+                guild_id INTEGER PRIMARY KEY,
+                shard_id INTEGER NOT NULL,
+                name TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS shard_guilds_shard_id ON shard_guilds (shard_id);
+            CREATE INDEX IF NOT EXISTS shard_guilds_name ON shard_guilds (name);
+        """)
+
+    def sync_shards(self, shard_ids, guilds):
+        """
+        Replaces the rows of the given shards with their current guilds.
+
+        @param shard_ids: the shards this process owns.
+        @type shard_ids: Iterable[int]
+        @param guilds: every guild of these shards.
+        @type guilds: Iterable[discord.Guild]
+        """
+        shard_ids = list(shard_ids)
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.execute(
+                f"DELETE FROM shard_guilds WHERE shard_id IN ({','.join('?' * len(shard_ids))})", shard_ids
+            )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO shard_guilds VALUES (?, ?, ?)",
+                [(guild.id, guild.shard_id or 0, guild.name) for guild in guilds],
+            )
+
+    def add_guild(self, guild):
+        self._db.execute("INSERT OR REPLACE INTO shard_guilds VALUES (?, ?, ?)", (guild.id, guild.shard_id or 0, guild.name))
+
+    def remove_guild(self, guild_id: int):
+        self._db.execute("DELETE FROM shard_guilds WHERE guild_id = ?", (int(guild_id),))
+
+    def guild_count(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM shard_guilds").fetchone()[0]
+
+    def shard_count(self) -> int:
+        return self._db.execute("SELECT COUNT(DISTINCT shard_id) FROM shard_guilds").fetchone()[0]
+
+    def guild_names(self, page: int, page_size: int) -> list:
+        """
+        @return: one page (1 based) of the name sorted guild names of every shard.
+        """
+        return [
+            row[0] for row in self._db.execute(
+                "SELECT name FROM shard_guilds ORDER BY name LIMIT ? OFFSET ?", (page_size, (page - 1) * page_size)
+            )
+        ]
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,178 @@
+import os
+import struct
+import tempfile
+import zlib
+
+from EventLog import EVENT_LOG
+
+#? Snapshot file layout: header (magic, version, crc32 and length of the payload) + zlib compressed payload.
+SNAPSHOT_MAGIC = b'PVCS'
+SNAPSHOT_VERSION = 4
+_HEADER = struct.Struct('<4sHIQ')
+_COUNT = struct.Struct('<I')
+_STAMP = struct.Struct('<qq')
+_GROUP = struct.Struct('<QQQQ')
+_LEGACY = struct.Struct('<QQQ')
+_MEMBER = struct.Struct('<QQ')
+_ROLE = struct.Struct('<Q')
+_CATEGORY = struct.Struct('<QQ')
+_WATERMARK = struct.Struct('<Qd')
+_ACTIVITY = struct.Struct('<Qd')
+_GUILD_NAME = struct.Struct('<QH')
+
+
+class Snapshot:
+    """
+    Warm start state: the group store (json backend only), the category cache, the guild list,
+    the reconciliation watermarks and the voice channels' activity.
+    """
+
+    def __init__(self, store_stamp: tuple = None, groups: dict = None, members: dict = None, unknown_members: set = None, legacy: dict = None, categories: dict = None, guild_names: dict = None, watermarks: dict = None, activity: dict = None):
+        """
+        @param store_stamp: `(mtime_ns, size)` of the json database the groups were taken from, None if they were not.
+        @param groups: `{role_id: (guild_id, owner_id, vc_id)}`.
+        @param members: `{role_id: set(member_ids)}`.
+        @param unknown_members: role ids of the groups whose members are not all known.
+        @param legacy: `{owner_id: (role_id, vc_id)}`.
+        @param categories: `{guild_id: category_id}`.
+        @param guild_names: `{guild_id: name}`.
+        @param watermarks: `{guild_id: unix time of the guild's last reconciliation}`.
+        @param activity: `{channel_id: unix time of the channel's last voice activity}`.
+        """
+        self.store_stamp = store_stamp
+        self.groups = groups or dict()
+        self.members = members or dict()
+        self.unknown_members = unknown_members or set()
+        self.legacy = legacy or dict()
+        self.categories = categories or dict()
+        self.guild_names = guild_names or dict()
+        self.watermarks = watermarks or dict()
+        self.activity = activity or dict()
+
+
+def file_stamp(path: str) -> tuple:
+    """
+    @return: the `(mtime_ns, size)` of the file, None if it does not exist.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _pack_rows(row: struct.Struct, rows: list) -> bytes:
+    return _COUNT.pack(len(rows)) + b''.join([row.pack(*values) for values in rows])
+
+
+def _unpack_rows(row: struct.Struct, data: bytes, offset: int) -> tuple:
+    count, = _COUNT.unpack_from(data, offset)
+    offset += _COUNT.size
+    end = offset + count * row.size
+    if end > len(data):
+        raise ValueError("truncated section")
+    return list(row.iter_unpack(data[offset:end])), end
+
+
+def encode_snapshot(snapshot: Snapshot) -> bytes:
+    names = list()
+    for guild_id, name in snapshot.guild_names.items():
+        encoded = name.encode('utf-8')[:0xFFFF]
+        names.append(_GUILD_NAME.pack(guild_id, len(encoded)) + encoded)
+    payload = b''.join([
+        _STAMP.pack(*(snapshot.store_stamp or (-1, -1))),
+        _pack_rows(_GROUP, [(role_id, *group) for role_id, group in snapshot.groups.items()]),
+        _pack_rows(_MEMBER, [(role_id, member_id) for role_id, member_ids in snapshot.members.items() for member_id in member_ids]),
+        _pack_rows(_ROLE, [(role_id,) for role_id in snapshot.unknown_members]),
+        _pack_rows(_LEGACY, [(owner_id, *group) for owner_id, group in snapshot.legacy.items()]),
+        _pack_rows(_CATEGORY, list(snapshot.categories.items())),
+        _pack_rows(_WATERMARK, list(snapshot.watermarks.items())),
+        _pack_rows(_ACTIVITY, list(snapshot.activity.items())),
+        _COUNT.pack(len(names)),
+        *names,
+    ])
+    payload = zlib.compress(payload, 1)
+    return _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, zlib.crc32(payload), len(payload)) + payload
+
+
+def decode_snapshot(data: bytes) -> Snapshot:
+    """
+    @raise ValueError: the data is not a snapshot of this version, or it is corrupted.
+    """
+    if len(data) < _HEADER.size:
+        raise ValueError("truncated header")
+    magic, version, checksum, length = _HEADER.unpack_from(data)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise ValueError(f"unsupported snapshot version {version}")
+    payload = data[_HEADER.size:]
+    if len(payload) != length or zlib.crc32(payload) != checksum:
+        raise ValueError("checksum mismatch")
+    try:
+        payload = zlib.decompress(payload)
+    except zlib.error as e:
+        raise ValueError(str(e))
+
+    mtime_ns, size = _STAMP.unpack_from(payload)
+    offset = _STAMP.size
+    groups, offset = _unpack_rows(_GROUP, payload, offset)
+    member_rows, offset = _unpack_rows(_MEMBER, payload, offset)
+    unknown_members, offset = _unpack_rows(_ROLE, payload, offset)
+    legacy, offset = _unpack_rows(_LEGACY, payload, offset)
+    categories, offset = _unpack_rows(_CATEGORY, payload, offset)
+    watermarks, offset = _unpack_rows(_WATERMARK, payload, offset)
+    activity, offset = _unpack_rows(_ACTIVITY, payload, offset)
+    count, = _COUNT.unpack_from(payload, offset)
+    offset += _COUNT.size
+    members = dict()
+    for role_id, member_id in member_rows:
+        members.setdefault(role_id, set()).add(member_id)
+    guild_names = dict()
+    for _ in range(count):
+        guild_id, name_length = _GUILD_NAME.unpack_from(payload, offset)
+        offset += _GUILD_NAME.size
+        guild_names[guild_id] = payload[offset:offset + name_length].decode('utf-8', errors='replace')
+        offset += name_length
+
+    return Snapshot(
+        store_stamp=None if mtime_ns < 0 else (mtime_ns, size),
+        groups={role_id: (guild_id, owner_id, vc_id) for role_id, guild_id, owner_id, vc_id in groups},
+        members=members,
+        unknown_members={role_id for role_id, in unknown_members},
+        legacy={owner_id: (role_id, vc_id) for owner_id, role_id, vc_id in legacy},
+        categories=dict(categories),
+        guild_names=guild_names,
+        watermarks=dict(watermarks),
+        activity=dict(activity),
+    )
+
+
+def read_snapshot(path: str) -> Snapshot:
+    """
+    @return: the snapshot stored at `path`, None if there is none or it is invalid.
+    """
+    try:
+        with open(path, 'rb') as f:
+            return decode_snapshot(f.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, struct.error) as e:
+        EVENT_LOG.error('snapshot_invalid', e, path=path)
+        return None
+
+
+def write_snapshot(path: str, snapshot: Snapshot):
+    """
+    Writes the snapshot to a temp file next to `path` and renames it over `path`.
+    """
+    data = encode_snapshot(snapshot)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.snapshot-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,210 @@
+"""
+Offline benchmark of the group commands against a simulated Discord guild / REST layer.
+
+Usage (from the repository root):
+    python benchmarks/bench_commands.py --groups 10000 --users 50 --latency 0.05 --rate-limit 0.01
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+THIS_FOLDER = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(THIS_FOLDER))
+sys.path.insert(0, THIS_FOLDER)
+
+import fake_discord  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--groups', type=int, default=1000, help='groups already in the store before the run')
+    parser.add_argument('--guilds', type=int, default=10, help='amount of simulated guilds')
+    parser.add_argument('--members', type=int, default=500, help='members per guild')
+    parser.add_argument('--users', type=int, default=20, help='concurrent users running commands')
+    parser.add_argument('--rounds', type=int, default=5, help='create/add/remove/purge cycles per user')
+    parser.add_argument('--group-size', type=int, default=5, help='members tagged in create_pvc')
+    parser.add_argument('--latency', type=float, default=0.05, help='mean seconds per REST call')
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='probability of a REST call returning 429')
+    parser.add_argument('--cold-cache', action='store_true', help='no resolved mentions and an empty member cache')
+    parser.add_argument('--edit-window', type=float, default=1.0, help='seconds channel edits are coalesced for')
+    parser.add_argument('--admin-purge', action='store_true', help='finish with an admin `purge_pvcs all` of the first guild')
+    parser.add_argument('--backend', choices=('json', 'sqlite'), default='json', help='group store backend')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+def import_bot(workdir: str, backend: str, edit_window: float):
+    """
+    Imports Bot.py against a throwaway config and database.
+    """
+    config_path = os.path.join(workdir, 'botconfig.cfg')
+    with open(config_path, 'w') as f:
+        f.write(f"[data]\ntoken = benchmark\nprefix = !\nstore_backend = {backend}\n"
+                f"store_path = {os.path.join(workdir, 'user_channels.db')}\n"
+                f"outbox_path = {os.path.join(workdir, 'provisioning.db')}\n"
+                f"channel_edit_window = {edit_window}\n"
+                f"snapshot_path = {os.path.join(workdir, 'warm_start.snapshot')}\n"
+                f"log_path = {os.path.join(workdir, 'events.log')}\n")
+    os.environ['PVC_CONFIG_PATH'] = config_path
+    os.environ['PVC_JSON_PATH'] = os.path.join(workdir, 'user_channels.json')
+    import Bot
+    return Bot
+
+
+def populate(Bot, guilds: list, amount: int):
+    """
+    Fills the store (and the guilds) with `amount` existing groups.
+    """
+    for i in range(amount):
+        guild = guilds[i % len(guilds)]
+        category = Bot.CATEGORY_CACHE.get(guild)
+        if category is None:
+            category = fake_discord.FakeCategory(guild, Bot.CATEGORY_CACHE.name)
+            guild.channels_by_id[category.id] = category
+        role = fake_discord.FakeRole(guild, f"owner{i}'s Private Group")
+        vc = fake_discord.FakeVoiceChannel(guild, category, f"owner{i}'s Private Voice Channel", 1)
+        guild.roles_by_id[role.id] = guild.all_roles[role.id] = role
+        guild.channels_by_id[vc.id] = vc
+        owner_id = fake_discord.next_id()
+        Bot.GROUP_STORE.set(guild.id, owner_id, role.id, vc.id, [owner_id])
+
+
+def store_bytes_on_disk(Bot) -> int:
+    paths = [Bot.USER_CHANNELS_JSON_PATH]
+    if hasattr(Bot.GROUP_STORE, '_db'):
+        paths += [Bot.GROUP_STORE.path, Bot.GROUP_STORE.path + '-wal']
+    return sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+async def run_command(Bot, stats, name: str, ctx, *args):
+    calls = Counter()
+    fake_discord.CURRENT_CALLS.set(calls)
+    started = time.perf_counter()
+    try:
+        await Bot.BOT.get_command(name).callback(ctx, *args)
+    except Exception as e:
+        stats['errors'][name] += 1
+        print(f"[!] {name} raised {e!r}")
+    stats['latency'][name].append(time.perf_counter() - started)
+    stats['calls'][name].update(calls)
+
+
+async def wait_provisioned(Bot, stats, name: str, guild, author):
+    """
+    Waits for the background job a command submitted, recording the time until the group is provisioned.
+    """
+    started = time.perf_counter()
+    while Bot.PROVISIONER.is_pending(guild.id, author.id):
+        await asyncio.sleep(0.001)
+    stats['provisioned'][name].append(stats['latency'][name][-1] + time.perf_counter() - started)
+
+
+def make_ctx(guild, author, tagged: list, cold_cache: bool):
+    return fake_discord.FakeContext(guild, author, [] if cold_cache else tagged)
+
+
+async def user_session(Bot, stats, guild, author, args):
+    members = [m for m in guild.members_by_id.values() if m is not author]
+    for _ in range(args.rounds):
+        tagged = random.sample(members, args.group_size)
+        extra = random.sample([m for m in members if m not in tagged], 2)
+        await run_command(Bot, stats, 'create_pvc', make_ctx(guild, author, tagged, args.cold_cache), *[m.mention for m in tagged])
+        await wait_provisioned(Bot, stats, 'create_pvc', guild, author)
+        await run_command(Bot, stats, 'add_members', make_ctx(guild, author, extra, args.cold_cache), *[m.mention for m in extra])
+        await run_command(Bot, stats, 'remove_members', make_ctx(guild, author, tagged[:1], args.cold_cache), tagged[0].mention)
+        await run_command(Bot, stats, 'purge_pvc', make_ctx(guild, author, [], args.cold_cache))
+        await wait_provisioned(Bot, stats, 'purge_pvc', guild, author)
+
+
+async def benchmark(Bot, args):
+    http = fake_discord.FakeHTTP(latency=args.latency, rate_limit_rate=args.rate_limit)
+    guilds = [fake_discord.FakeGuild(http, f'guild{i}', args.members) for i in range(args.guilds)]
+    for guild in guilds:
+        if not args.cold_cache:
+            guild.cached_members = dict(guild.members_by_id)
+
+    populate(Bot, guilds, args.groups)
+    guilds_by_id = {guild.id: guild for guild in guilds}
+    Bot.PROVISIONER.get_guild = guilds_by_id.get
+    Bot.PROVISIONER.start()
+    await Bot.GROUP_STORE.flush()
+    flush_task = asyncio.ensure_future(Bot.GROUP_STORE.flush_loop())
+    bytes_before = store_bytes_on_disk(Bot)
+    written = {'bytes': 0, 'flushes': 0}
+    if hasattr(Bot.GROUP_STORE, '_write_atomic'):
+        write_atomic = Bot.GROUP_STORE._write_atomic
+
+        def counting_write(path, snapshot):
+            write_atomic(path, snapshot)
+            written['bytes'] += os.path.getsize(path)
+            written['flushes'] += 1
+        Bot.GROUP_STORE._write_atomic = counting_write
+
+    stats = {'latency': defaultdict(list), 'provisioned': defaultdict(list), 'calls': defaultdict(Counter), 'errors': Counter()}
+    sessions = list()
+    for i in range(args.users):
+        guild = guilds[i % len(guilds)]
+        author = list(guild.members_by_id.values())[i // len(guilds)]
+        sessions.append(user_session(Bot, stats, guild, author, args))
+
+    started = time.perf_counter()
+    await asyncio.gather(*sessions)
+    if args.admin_purge:
+        admin = list(guilds[0].members_by_id.values())[-1]
+        await run_command(Bot, stats, 'purge_pvcs', make_ctx(guilds[0], admin, [], args.cold_cache), 'all')
+    await Bot.CHANNEL_EDITOR.flush_all()
+    elapsed = time.perf_counter() - started
+    await Bot.GROUP_STORE.flush()
+    flush_task.cancel()
+    if not written['flushes']:
+        written['bytes'] = store_bytes_on_disk(Bot) - bytes_before
+    return stats, elapsed, http, written
+
+
+def report(stats, elapsed: float, http, written: dict, Bot):
+    total = sum(len(latencies) for latencies in stats['latency'].values())
+    print(f"{'command':<20}{'count':>8}{'p50 ms':>10}{'p99 ms':>10}{'REST/cmd':>10}{'errors':>8}")
+    for name, latencies in stats['latency'].items():
+        calls = stats['calls'][name]
+        rest = sum(count for route, count in calls.items() if not route.startswith('GATEWAY'))
+        print(f"{name:<20}{len(latencies):>8}{percentile(latencies, 0.5) * 1000:>10.1f}"
+              f"{percentile(latencies, 0.99) * 1000:>10.1f}{rest / len(latencies):>10.2f}{stats['errors'][name]:>8}")
+    for name, latencies in stats['provisioned'].items():
+        print(f"{name + ' (done)':<20}{len(latencies):>8}{percentile(latencies, 0.5) * 1000:>10.1f}"
+              f"{percentile(latencies, 0.99) * 1000:>10.1f}")
+    print()
+    print(f"commands/s:        {total / elapsed:.1f} ({total} commands in {elapsed:.2f}s)")
+    print(f"REST calls:        {sum(c for r, c in http.calls.items() if not r.startswith('GATEWAY'))}")
+    print(f"gateway requests:  {sum(c for r, c in http.calls.items() if r.startswith('GATEWAY'))}")
+    print(f"429 responses:     {http.rate_limited} (waited {http.rate_limit_wait:.2f}s retrying, "
+          f"{Bot.ROLE_EXECUTOR.rate_limit_wait:.2f}s in role buckets)")
+    print(f"store I/O:         {written['bytes']} bytes written in {written['flushes']} flushes, {len(Bot.GROUP_STORE)} groups")
+    print(f"event log:         {Bot.EVENT_LOG.dropped} records dropped, {Bot.EVENT_LOG.suppressed} errors suppressed")
+    print()
+    print("REST calls by route:")
+    for route, count in http.calls.most_common():
+        print(f"  {count:>8}  {route}")
+
+
+def main():
+    args = parse_args()
+    random.seed(args.seed)
+    with tempfile.TemporaryDirectory() as workdir:
+        Bot = import_bot(workdir, args.backend, args.edit_window)
+        stats, elapsed, http, written = asyncio.run(benchmark(Bot, args))
+        report(stats, elapsed, http, written, Bot)
+        Bot.GROUP_STORE.close()
+
+
+if __name__ == '__main__':
+    main()
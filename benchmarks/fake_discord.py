@@ -0,0 +1,316 @@
+import asyncio
+import contextvars
+import datetime
+import itertools
+import random
+from collections import Counter
+from types import SimpleNamespace
+
+import discord
+
+#? Counter of the REST calls made by the command currently running (set per command by the benchmark).
+CURRENT_CALLS = contextvars.ContextVar('CURRENT_CALLS', default=None)
+
+_ids = itertools.count(10 ** 17)
+
+
+def next_id() -> int:
+    return next(_ids)
+
+
+class FakeResponse:
+    """
+    Stands in for the aiohttp response `discord.HTTPException` is built from.
+    """
+
+    def __init__(self, status: int, headers: dict):
+        self.status = status
+        self.reason = 'Too Many Requests' if status == 429 else 'Error'
+        self.headers = headers
+
+
+class FakeHTTP:
+    """
+    Simulated REST layer: every call sleeps `latency` seconds (plus jitter), is counted by route,
+    and is rate limited (429) with probability `rate_limit_rate`.
+    Like discord.py, a 429 is slept off and retried, and only raised after `max_tries` attempts.
+    The by-id routes (`delete_role`, `delete_channel`) work on the guilds registered in `guilds`.
+    """
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.01, rate_limit_rate: float = 0.0, retry_after: float = 0.25, max_tries: int = 5):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.max_tries = max_tries
+        self.calls = Counter()
+        self.rate_limited = 0
+        self.rate_limit_wait = 0.0
+        self.guilds = dict()
+
+    async def request(self, route: str):
+        calls = CURRENT_CALLS.get()
+        for tries in range(self.max_tries):
+            self.calls[route] += 1
+            if calls is not None:
+                calls[route] += 1
+            await asyncio.sleep(max(0.0, random.gauss(self.latency, self.jitter)))
+            if not self.rate_limit_rate or random.random() >= self.rate_limit_rate:
+                return
+            self.rate_limited += 1
+            if tries < self.max_tries - 1:
+                self.rate_limit_wait += self.retry_after
+                await asyncio.sleep(self.retry_after)
+        headers = {'X-RateLimit-Remaining': '0', 'Retry-After': str(self.retry_after)}
+        raise discord.HTTPException(FakeResponse(429, headers), {'message': 'You are being rate limited.', 'code': 0})
+
+    async def delete_role(self, guild_id: int, role_id: int, *, reason=None):
+        role = self.guilds[guild_id].all_roles.get(role_id, None)
+        if role is None:
+            await self.request('DELETE /guilds/{guild_id}/roles/{role_id}')
+            raise discord.NotFound(FakeResponse(404, {}), {'message': 'Unknown Role', 'code': 10011})
+        await role.delete()
+
+    async def delete_channel(self, channel_id: int, *, reason=None):
+        for guild in self.guilds.values():
+            channel = guild.channels_by_id.get(channel_id, None)
+            if channel is not None:
+                return await channel.delete()
+        await self.request('DELETE /channels/{channel_id}')
+        raise discord.NotFound(FakeResponse(404, {}), {'message': 'Unknown Channel', 'code': 10003})
+
+
+class FakeUser:
+    def __init__(self, user_id: int, name: str):
+        self.id = user_id
+        self.name = name
+        self.bot = False
+
+
+class FakeRole:
+    def __init__(self, guild, name: str):
+        self.guild = guild
+        self.id = next_id()
+        self.name = name
+        self.created_at = datetime.datetime.utcnow()
+
+    @property
+    def mention(self) -> str:
+        return f'<@&{self.id}>'
+
+    @property
+    def members(self) -> list:
+        return [member for member in self.guild.cached_members.values() if self in member.role_set]
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __eq__(self, other):
+        return isinstance(other, FakeRole) and other.id == self.id
+
+    async def delete(self):
+        await self.guild.http.request('DELETE /guilds/{guild_id}/roles/{role_id}')
+        self.guild.roles_by_id.pop(self.id, None)
+        self.guild.all_roles.pop(self.id, None)
+        for member in self.guild.members_by_id.values():
+            member.role_set.discard(self)
+
+
+class FakeMember(discord.Member):
+    """
+    `discord.Member` subclass (the commands check `isinstance(..., discord.Member)`) without any gateway state.
+    """
+
+    def __init__(self, guild, user_id: int, name: str):
+        self._user = FakeUser(user_id, name)
+        self.guild = guild
+        self.nick = None
+        self.role_set = set()
+
+    @property
+    def roles(self) -> list:
+        return list(self.role_set)
+
+    @property
+    def mention(self) -> str:
+        return f'<@{self.id}>'
+
+    @property
+    def display_name(self) -> str:
+        return self.name
+
+    async def add_roles(self, *roles, reason=None, atomic=True):
+        for role in roles:
+            await self.guild.http.request('PUT /guilds/{guild_id}/members/{user_id}/roles/{role_id}')
+            self.role_set.add(role)
+
+    async def remove_roles(self, *roles, reason=None, atomic=True):
+        for role in roles:
+            await self.guild.http.request('DELETE /guilds/{guild_id}/members/{user_id}/roles/{role_id}')
+            self.role_set.discard(role)
+
+
+class FakeVoiceChannel:
+    def __init__(self, guild, category, name: str, user_limit: int = 0, overwrites=None):
+        self.guild = guild
+        self.category = category
+        self.id = next_id()
+        self.name = name
+        self.user_limit = user_limit
+        self.overwrites = overwrites or dict()
+        self.members = list()
+        self.voice_states = dict()
+        self.created_at = datetime.datetime.utcnow()
+
+    async def edit(self, **fields):
+        await self.guild.http.request('PATCH /channels/{channel_id}')
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    async def delete(self):
+        await self.guild.http.request('DELETE /channels/{channel_id}')
+        self.guild.channels_by_id.pop(self.id, None)
+
+
+class FakeCategory:
+    def __init__(self, guild, name: str):
+        self.guild = guild
+        self.id = next_id()
+        self.name = name
+
+    @property
+    def voice_channels(self) -> list:
+        return [c for c in self.guild.channels_by_id.values() if isinstance(c, FakeVoiceChannel) and c.category is self]
+
+    async def create_voice_channel(self, name: str, **options):
+        await self.guild.http.request('POST /guilds/{guild_id}/channels')
+        vc = FakeVoiceChannel(self.guild, self, name, options.get('user_limit', 0), options.get('overwrites', None))
+        self.guild.channels_by_id[vc.id] = vc
+        return vc
+
+
+class FakeGuild:
+    """
+    Simulated guild with an in-memory member cache (`cached_members`) that can be smaller than the guild.
+    Like discord.py, a created role is only cached (`roles_by_id`) once its gateway event comes in,
+    `all_roles` holds every role of the guild, cached or not.
+    """
+
+    def __init__(self, http: FakeHTTP, name: str, member_count: int):
+        self.http = http
+        self._state = SimpleNamespace(http=http)
+        self.id = next_id()
+        http.guilds[self.id] = self
+        self.name = name
+        self.default_role = FakeRole(self, '@everyone')
+        self.roles_by_id = {self.default_role.id: self.default_role}
+        self.all_roles = dict(self.roles_by_id)
+        self.channels_by_id = dict()
+        self.members_by_id = dict()
+        self.cached_members = dict()
+        for i in range(member_count):
+            member = FakeMember(self, next_id(), f'user{i}')
+            self.members_by_id[member.id] = member
+
+    @property
+    def roles(self) -> list:
+        return list(self.roles_by_id.values())
+
+    @property
+    def chunked(self) -> bool:
+        return len(self.cached_members) == len(self.members_by_id)
+
+    @property
+    def categories(self) -> list:
+        return [c for c in self.channels_by_id.values() if isinstance(c, FakeCategory)]
+
+    def get_role(self, role_id: int):
+        return self.roles_by_id.get(role_id, None)
+
+    def get_channel(self, channel_id: int):
+        return self.channels_by_id.get(channel_id, None)
+
+    def get_member(self, member_id: int):
+        return self.cached_members.get(member_id, None)
+
+    async def fetch_member(self, member_id: int):
+        await self.http.request('GET /guilds/{guild_id}/members/{user_id}')
+        member = self.members_by_id.get(member_id, None)
+        if member is None:
+            raise discord.NotFound(FakeResponse(404, {}), {'message': 'Unknown Member', 'code': 10007})
+        return member
+
+    async def query_members(self, query=None, *, limit=5, user_ids=None, presences=False, cache=True):
+        #? Gateway request, counted apart from REST.
+        await self.http.request('GATEWAY request_guild_members')
+        members = [self.members_by_id[i] for i in user_ids or () if i in self.members_by_id]
+        if cache:
+            self.cached_members.update({member.id: member for member in members})
+        return members
+
+    async def create_role(self, name: str, **fields):
+        await self.http.request('POST /guilds/{guild_id}/roles')
+        role = FakeRole(self, name)
+        self.all_roles[role.id] = role
+        #? The GUILD_ROLE_CREATE event arrives after the REST response.
+        asyncio.get_event_loop().call_later(self.http.latency, self._role_created, role)
+        return role
+
+    def _role_created(self, role: FakeRole):
+        if role.id in self.all_roles:
+            self.roles_by_id[role.id] = role
+
+    async def create_category(self, name: str, **options):
+        await self.http.request('POST /guilds/{guild_id}/channels')
+        category = FakeCategory(self, name)
+        self.channels_by_id[category.id] = category
+        return category
+
+
+class FakeMessage:
+    def __init__(self, author, mentions: list):
+        self.author = author
+        self.mentions = mentions
+        self.created_at = datetime.datetime.utcnow()
+
+
+class FakeSentMessage:
+    def __init__(self, channel, message_id: int):
+        self.channel = channel
+        self.id = message_id
+
+    async def edit(self, *, embed=None):
+        await self.channel.http.request('PATCH /channels/{channel_id}/messages/{message_id}')
+        self.channel.edited.append(embed)
+
+
+class FakeChannel:
+    def __init__(self, guild: FakeGuild):
+        self.http = guild.http
+        self.id = next_id()
+        self.sent = list()
+        self.edited = list()
+        guild.channels_by_id[self.id] = self
+
+    async def send(self, content=None, *, embed=None):
+        await self.http.request('POST /channels/{channel_id}/messages')
+        self.sent.append(embed if embed is not None else content)
+        return FakeSentMessage(self, next_id())
+
+    def get_partial_message(self, message_id: int):
+        return FakeSentMessage(self, message_id)
+
+
+class FakeContext:
+    """
+    The parts of `commands.Context` the group commands use.
+    """
+
+    def __init__(self, guild: FakeGuild, author: FakeMember, mentions: list):
+        self.guild = guild
+        self.author = author
+        self.message = FakeMessage(author, mentions)
+        self.channel = FakeChannel(guild)
+
+    async def send(self, content=None, *, embed=None):
+        return await self.channel.send(content, embed=embed)
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ChannelEditor import ChannelEditor
+from GroupStore import GroupStore, SqliteGroupStore
+
+GUILD_ID, OWNER_ID, ROLE_ID, VC_ID, NEW_MEMBER_ID = 1, 10, 100, 1000, 20
+
+
+class FakeVoiceChannel:
+    """
+    Voice channel of a guild whose member list is not cached (default intents).
+    """
+
+    def __init__(self, user_limit: int):
+        self.id = VC_ID
+        self.name = "owner's Private Voice Channel"
+        self.user_limit = user_limit
+        self.overwrites = dict()
+        self.guild = SimpleNamespace(id=GUILD_ID, chunked=False, get_channel=lambda channel_id: self)
+        self.edits = list()
+
+    async def edit(self, **fields):
+        self.edits.append(fields)
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+
+def add_members(store, channel: FakeVoiceChannel, member_ids: list) -> int:
+    """
+    Does what `add_members` does to the store and the channel, returns the channel's new user limit.
+    """
+    role = SimpleNamespace(id=ROLE_ID, guild=channel.guild, members=list())
+
+    async def run():
+        editor = ChannelEditor(0.0, store.group_members)
+        store.add_members(ROLE_ID, member_ids)
+        editor.update_members(channel, role, added_ids=member_ids)
+        await editor.flush(channel.id)
+
+    asyncio.run(run())
+    return channel.user_limit
+
+
+class GroupMigrationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.json_path = os.path.join(self.workdir.name, 'user_channels.json')
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def write_v2_json(self):
+        with open(self.json_path, 'w') as f:
+            json.dump({'version': 2, 'groups': {str(GUILD_ID): {str(OWNER_ID): [str(ROLE_ID), str(VC_ID)]}}, 'legacy': dict()}, f)
+
+    def test_v2_json_members_are_unknown(self):
+        self.write_v2_json()
+        store = GroupStore(self.json_path)
+        store.load()
+        self.assertIsNone(store.group_members(ROLE_ID))
+        self.assertEqual(store.member_groups(GUILD_ID, OWNER_ID), [ROLE_ID])
+
+    def test_v2_json_add_members_keeps_user_limit(self):
+        #? 6 members hold the role, the database only knows the owner.
+        self.write_v2_json()
+        store = GroupStore(self.json_path)
+        store.load()
+        self.assertEqual(add_members(store, FakeVoiceChannel(6), [NEW_MEMBER_ID]), 7)
+        self.assertIsNone(store.group_members(ROLE_ID))
+
+    def test_unknown_members_survive_a_flush(self):
+        self.write_v2_json()
+        store = GroupStore(self.json_path)
+        store.load()
+        store.add_members(ROLE_ID, [NEW_MEMBER_ID])
+        store.flush_sync()
+        reloaded = GroupStore(self.json_path)
+        reloaded.load()
+        self.assertIsNone(reloaded.group_members(ROLE_ID))
+        self.assertTrue(reloaded.is_member(ROLE_ID, NEW_MEMBER_ID))
+
+    def test_backfilled_members_are_used(self):
+        self.write_v2_json()
+        store = GroupStore(self.json_path)
+        store.load()
+        store.set_members(ROLE_ID, [OWNER_ID, 11, 12])
+        self.assertEqual(add_members(store, FakeVoiceChannel(6), [NEW_MEMBER_ID]), 4)
+
+    def test_sqlite_single_group_table_add_members_keeps_user_limit(self):
+        db_path = os.path.join(self.workdir.name, 'user_channels.db')
+        db = sqlite3.connect(db_path)
+        db.execute("CREATE TABLE groups (guild_id INTEGER, owner_id INTEGER, role_id INTEGER, channel_id INTEGER)")
+        db.execute("INSERT INTO groups VALUES (?, ?, ?, ?)", (GUILD_ID, OWNER_ID, ROLE_ID, VC_ID))
+        db.commit()
+        db.close()
+        store = SqliteGroupStore(db_path)
+        store.load()
+        self.assertIsNone(store.group_members(ROLE_ID))
+        self.assertEqual(add_members(store, FakeVoiceChannel(6), [NEW_MEMBER_ID]), 7)
+        store.close()
+
+    def test_new_groups_members_are_known(self):
+        store = GroupStore(self.json_path)
+        store.set(GUILD_ID, OWNER_ID, ROLE_ID, VC_ID, [OWNER_ID, 11])
+        self.assertEqual(store.group_members(ROLE_ID), {OWNER_ID, 11})
+        self.assertEqual(add_members(store, FakeVoiceChannel(2), [NEW_MEMBER_ID]), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
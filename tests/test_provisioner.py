@@ -0,0 +1,107 @@
+import asyncio
+import datetime
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import discord
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import fake_discord  # noqa: E402
+from CategoryCache import CategoryCache  # noqa: E402
+from EventLog import EVENT_LOG  # noqa: E402
+from GroupStore import GroupStore  # noqa: E402
+from LockManager import LockManager  # noqa: E402
+from Provisioner import Outbox, Provisioner  # noqa: E402
+from Reconciler import Reconciler  # noqa: E402
+from RoleExecutor import RoleExecutor  # noqa: E402
+
+
+class ProvisionerTest(unittest.TestCase):
+    """
+    discord.py does not cache a created role until its gateway event comes in, the jobs must not depend on it.
+    """
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.store = GroupStore(os.path.join(self.workdir.name, 'user_channels.json'))
+        self.store.load()
+        self.outbox = Outbox(':memory:')
+        self.outbox.load()
+        self.notified = list()
+
+    def tearDown(self):
+        self.outbox.close()
+        self.workdir.cleanup()
+
+    def run_create(self) -> tuple:
+        """
+        Runs a create job in a guild whose role create events never arrive, returns the guild and the job.
+        """
+
+        async def notify(guild, job, kind, title, text):
+            self.notified.append(kind)
+
+        async def run():
+            guild = fake_discord.FakeGuild(fake_discord.FakeHTTP(latency=0.0, jitter=0.0), 'guild', 3)
+            guild._role_created = lambda role: None
+            provisioner = Provisioner(
+                self.outbox, self.store, CategoryCache(), RoleExecutor(), LockManager(), lambda guild_id: guild, notify, workers=1,
+            )
+            provisioner.start()
+            owner_id, member_id = list(guild.members_by_id)[:2]
+            job = provisioner.submit_create(guild.id, owner_id, 'owner', [owner_id, member_id], 0, 0)
+            await provisioner._queue.join()
+            return guild, job
+
+        return asyncio.run(run())
+
+    def test_create_uses_the_created_role(self):
+        guild, job = self.run_create()
+        self.assertEqual(self.notified, ['success'])
+        self.assertEqual(job.step, 'done')
+        self.assertEqual(self.store.get_group(job.state['role_id'])[2], job.state['vc_id'])
+        self.assertEqual(len(job.state['added_ids']), 2)
+
+    def test_failed_create_deletes_the_uncached_role(self):
+        async def create_voice_channel(category, name, **options):
+            raise discord.HTTPException(fake_discord.FakeResponse(500, {}), 'Internal Server Error')
+
+        with mock.patch.object(fake_discord.FakeCategory, 'create_voice_channel', create_voice_channel):
+            guild, job = self.run_create()
+        self.assertEqual(self.notified, ['error'])
+        self.assertEqual(job.step, 'failed')
+        self.assertNotIn(job.state['role_id'], guild.all_roles)
+        self.assertIsNone(self.store.get_group(job.state['role_id']))
+        #? The event log is not started, its records are still queued.
+        record = [record for record in EVENT_LOG._queue.queue if record['event'] == 'provisioning_failed'][-1]
+        self.assertEqual((record['command'], record['owner'], record['job']), ('create_pvc', job.owner_id, job.id))
+
+    def test_sweep_keeps_the_pending_jobs_roles(self):
+        async def run():
+            guild = fake_discord.FakeGuild(fake_discord.FakeHTTP(latency=0.0, jitter=0.0), 'guild', 1)
+            roles = [fake_discord.FakeRole(guild, "owner's Private Group") for _ in range(2)]
+            for role in roles:
+                role.created_at -= datetime.timedelta(hours=1)
+                guild.roles_by_id[role.id] = guild.all_roles[role.id] = role
+            #? The first role's creation is still waiting to assign the roles.
+            job = self.outbox.add('create', guild.id, 10, 0, 0, {'owner_name': 'owner', 'member_ids': [10]})
+            job.state['role_id'] = roles[0].id
+            self.outbox.checkpoint(job, 'assign_roles')
+            reconciler = Reconciler(self.store, CategoryCache(), LockManager(), pending_ids=self.outbox.pending_ids)
+            fixed = await reconciler.sweep_guild(guild)
+            return guild, roles, fixed
+
+        guild, roles, fixed = asyncio.run(run())
+        self.assertEqual(fixed, 1)
+        self.assertIn(roles[0].id, guild.all_roles)
+        self.assertNotIn(roles[1].id, guild.all_roles)
+
+
+if __name__ == '__main__':
+    unittest.main()